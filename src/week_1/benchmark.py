@@ -0,0 +1,299 @@
+import csv
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+CONFIDENCE = 0.95
+REGRESSION_THRESHOLD = 0.1
+
+
+def identity(value):
+    return value
+
+
+class Variant:
+    __slots__ = ("name", "func", "setup", "teardown", "expected")
+
+    def __init__(self, name, func, setup=None, teardown=None, expected=identity):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.teardown = teardown
+        self.expected = expected
+
+    def prepare(self) -> tuple[object, float]:
+        start = time.perf_counter_ns()
+        func = self.setup(self.func) if self.setup else self.func
+        return func, (time.perf_counter_ns() - start) / 1e9
+
+
+class Registry:
+    def __init__(self):
+        self.variants = {}
+
+    def add(self, name, func, setup=None, teardown=None, expected=identity):
+        self.variants[name] = Variant(name, func, setup, teardown, expected)
+        return func
+
+    def register(self, name, setup=None, teardown=None, expected=identity):
+        def decorator(func):
+            return self.add(name, func, setup, teardown, expected)
+
+        return decorator
+
+    def __iter__(self):
+        return iter(self.variants.values())
+
+    def __len__(self) -> int:
+        return len(self.variants)
+
+
+def median_interval(samples, confidence: float = CONFIDENCE) -> tuple[float, float]:
+    ordered = sorted(samples)
+    count = len(ordered)
+    tail = (1 - confidence) / 2
+    cumulative = 0.0
+    rank = 0
+    for i in range(count):
+        probability = math.comb(count, i) / 2**count
+        if cumulative + probability > tail:
+            break
+        cumulative += probability
+        rank = i + 1
+    if rank == 0:
+        return ordered[0], ordered[-1]
+    return ordered[rank - 1], ordered[count - rank]
+
+
+def summarize(samples: list[float], items: int) -> dict:
+    median = statistics.median(samples)
+    low, high = median_interval(samples)
+    return {
+        "trials": len(samples),
+        "median": median,
+        "ci_low": low,
+        "ci_high": high,
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "throughput": items / median if median else math.inf,
+    }
+
+
+def reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def run_trials(func, data, warmup: int = 1, trials: int = 5):
+    result = None
+    reset_peak_rss()
+    for _ in range(warmup):
+        result = func(data)
+    samples = []
+    for _ in range(trials):
+        gc.collect()
+        start = time.perf_counter_ns()
+        result = func(data)
+        samples.append((time.perf_counter_ns() - start) / 1e9)
+    return result, samples
+
+
+def run_suite(
+    registry: Registry, data_sizes, generate, warmup: int = 1, trials: int = 5
+) -> list[dict]:
+    records = []
+    variants = list(registry)
+    prepared = {}
+    try:
+        for variant in variants:
+            prepared[variant.name] = variant.prepare()
+        for size in data_sizes:
+            data = generate(size)
+            reference = None
+            for variant in variants:
+                func, setup_time = prepared[variant.name]
+                result, samples = run_trials(func, data, warmup, trials)
+                rss = peak_rss()
+                if hasattr(result, "tolist"):
+                    result = result.tolist()
+                if reference is None:
+                    reference = result
+                elif result != variant.expected(reference):
+                    raise RuntimeError(
+                        f"{variant.name}: результат не совпадает с эталоном "
+                        f"{variants[0].name} (размер {size})"
+                    )
+                record = {"variant": variant.name, "size": size}
+                record.update(summarize(samples, size))
+                record["setup"] = setup_time
+                record["peak_rss"] = rss
+                records.append(record)
+    finally:
+        for variant in variants:
+            if variant.name in prepared and variant.teardown:
+                variant.teardown()
+    return records
+
+
+def metadata() -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def save_results(records: list[dict], path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(records[0]))
+            writer.writeheader()
+            writer.writerows(records)
+    else:
+        with open(path, "w") as f:
+            json.dump({"meta": metadata(), "records": records}, f, indent=2)
+
+
+def load_results(path: str) -> list[dict]:
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            records = []
+            for row in csv.DictReader(f):
+                record = {"variant": row.pop("variant")}
+                record.update((key, float(value)) for key, value in row.items())
+                record["size"] = int(row["size"])
+                record["trials"] = int(row["trials"])
+                records.append(record)
+            return records
+    with open(path) as f:
+        return json.load(f)["records"]
+
+
+def compare_results(
+    baseline: list[dict], current: list[dict], threshold: float = REGRESSION_THRESHOLD
+) -> list[dict]:
+    previous = {(record["variant"], record["size"]): record for record in baseline}
+    changes = []
+    for record in current:
+        old = previous.get((record["variant"], record["size"]))
+        if old is None:
+            continue
+        ratio = record["median"] / old["median"]
+        if record["ci_low"] > old["ci_high"] and ratio > 1 + threshold:
+            status = "регрессия"
+        elif record["ci_high"] < old["ci_low"] and ratio < 1 - threshold:
+            status = "ускорение"
+        else:
+            status = "без изменений"
+        changes.append(
+            {
+                "variant": record["variant"],
+                "size": record["size"],
+                "ratio": ratio,
+                "status": status,
+            }
+        )
+    return changes
+
+
+def print_records(records: list[dict]):
+    for record in records:
+        print(
+            f"{record['variant']:>28} n={record['size']:<8} "
+            f"медиана {record['median']:.4f}s "
+            f"[{record['ci_low']:.4f}; {record['ci_high']:.4f}] "
+            f"{record['throughput']:,.0f} эл/с, setup {record['setup']:.3f}s, "
+            f"пик RSS {record['peak_rss']:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        changes = compare_results(load_results(sys.argv[1]), load_results(sys.argv[2]))
+        for change in changes:
+            print(
+                f"{change['variant']:>28} n={change['size']:<8} "
+                f"x{change['ratio']:.2f} {change['status']}"
+            )
+        sys.exit(any(change["status"] == "регрессия" for change in changes))
+
+    import tempfile
+
+    assert median_interval([5, 1, 3]) == (1, 5)
+    samples = list(range(1, 21))
+    assert median_interval(samples) == (6, 15)
+    stats = summarize([2.0, 1.0, 3.0], items=6)
+    assert stats["median"] == 2.0 and stats["throughput"] == 3.0
+
+    registry = Registry()
+    torn_down = []
+
+    @registry.register("sorted")
+    def sort_builtin(data):
+        return sorted(data)
+
+    def make_square(func):
+        return lambda data: [x * x for x in func(data)]
+
+    registry.add(
+        "squares",
+        sort_builtin,
+        setup=make_square,
+        teardown=lambda: torn_down.append(True),
+        expected=lambda reference: [x * x for x in reference],
+    )
+    records = run_suite(registry, [10, 100], lambda size: list(range(size, 0, -1)))
+    assert [(r["variant"], r["size"]) for r in records] == [
+        ("sorted", 10),
+        ("squares", 10),
+        ("sorted", 100),
+        ("squares", 100),
+    ]
+    assert all(r["trials"] == 5 and r["ci_low"] <= r["median"] for r in records)
+    assert torn_down == [True]
+
+    broken = Registry()
+    broken.add("sorted", sorted)
+    broken.add("reversed", lambda data: data[::-1])
+    try:
+        run_suite(broken, [5], lambda size: [3, 1, 2, 5, 4])
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in ("results.json", "results.csv"):
+            path = os.path.join(tmp_dir, name)
+            save_results(records, path)
+            loaded = load_results(path)
+            assert [r["median"] for r in loaded] == [r["median"] for r in records]
+            assert all(
+                c["status"] == "без изменений" for c in compare_results(loaded, records)
+            )
+
+    slower = [dict(r, median=r["median"] * 3, ci_low=r["ci_high"] * 2) for r in records]
+    assert compare_results(records, slower)[0]["status"] == "регрессия"
@@ -1,29 +1,326 @@
+import asyncio
+import gzip
+import hashlib
 import json
-from urllib.parse import unquote
+import math
+import os
+import time
+from urllib.parse import parse_qs, unquote
 
 import aiohttp
+import numpy as np
 import uvicorn
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
-async def fetch_currency_rate(currency: str) -> dict:
-    url = f"https://api.exchangerate-api.com/v4/latest/{currency}"
-    async with aiohttp.ClientSession(
-        connector=aiohttp.TCPConnector(ssl=False)
-    ) as session:
-        async with session.get(url) as response:
-            return await response.json()
+API_URL = os.environ.get(
+    "CURRENCY_API_URL", "https://api.exchangerate-api.com/v4/latest/{currency}"
+)
+CACHE_TTL = float(os.environ.get("CURRENCY_CACHE_TTL", "60"))
+CACHE_MAX_STALE = float(os.environ.get("CURRENCY_CACHE_MAX_STALE", "300"))
+PREFETCH_CURRENCIES = [
+    code.strip().upper()
+    for code in os.environ.get("CURRENCY_PREFETCH", "USD,EUR,RUB").split(",")
+    if code.strip()
+]
+BASE_CURRENCY = os.environ.get("CURRENCY_BASE", "USD").upper()
+DERIVE_RATES = os.environ.get("CURRENCY_DERIVE", "1") == "1"
+UPSTREAM_UPDATE_PERIOD = int(os.environ.get("CURRENCY_UPSTREAM_PERIOD", "86400"))
+COMPRESS_VARIANTS = os.environ.get("CURRENCY_COMPRESS", "1") == "1"
+COMPRESS_MIN_SIZE = 256
+RATE_FORMAT = ".6g"
+PREFETCH_INTERVAL = float(
+    os.environ.get("CURRENCY_PREFETCH_INTERVAL", str(CACHE_TTL * 0.8))
+)
 
+session: aiohttp.ClientSession | None = None
+prefetch_task: asyncio.Task | None = None
+rate_matrix = None
 
-async def app(scope, receive, send):
-    if scope["path"] == "/favicon.ico":
-        return
 
-    currency = unquote(scope["path"].strip("/")).upper()
-    data = await fetch_currency_rate(currency)
+class UnknownCurrency(Exception):
+    pass
+
+
+class InvalidUpstreamBody(Exception):
+    pass
+
+
+class RateEntry:
+    __slots__ = ("body", "etag", "variants", "headers", "not_modified_headers")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'.encode()
+
+        try:
+            last_updated = json.loads(body).get("time_last_updated")
+            if last_updated:
+                max_age = max(
+                    0, int(last_updated + UPSTREAM_UPDATE_PERIOD - time.time())
+                )
+            else:
+                max_age = int(CACHE_TTL)
+        except (ValueError, AttributeError, TypeError) as e:
+            raise InvalidUpstreamBody(repr(e)) from e
+        cache_control = f"public, max-age={max_age}".encode()
+
+        self.variants = {b"identity": body}
+        if COMPRESS_VARIANTS and len(body) >= COMPRESS_MIN_SIZE:
+            if brotli is not None:
+                self.variants[b"br"] = brotli.compress(body)
+            self.variants[b"gzip"] = gzip.compress(body, mtime=0)
+
+        self.not_modified_headers = [
+            [b"etag", self.etag],
+            [b"cache-control", cache_control],
+            [b"vary", b"accept-encoding"],
+        ]
+        self.headers = {}
+        for encoding, variant in self.variants.items():
+            headers = [
+                [b"content-type", b"application/json"],
+                [b"content-length", str(len(variant)).encode()],
+                *self.not_modified_headers,
+            ]
+            if encoding != b"identity":
+                headers.append([b"content-encoding", encoding])
+            self.headers[encoding] = headers
+
+    def matches(self, if_none_match: bytes) -> bool:
+        if if_none_match.strip() == b"*":
+            return True
+        for tag in if_none_match.split(b","):
+            tag = tag.strip()
+            if tag.startswith(b"W/"):
+                tag = tag[2:]
+            if tag == self.etag:
+                return True
+        return False
+
+    def negotiate(self, accept_encoding: bytes) -> bytes:
+        accepted = set()
+        for item in accept_encoding.split(b","):
+            coding, _, params = item.strip().partition(b";")
+            if params.replace(b" ", b"") in (b"q=0", b"q=0.0", b"q=0.00"):
+                continue
+            accepted.add(coding.strip().lower())
+        for encoding in (b"br", b"gzip"):
+            if encoding in self.variants and (encoding in accepted or b"*" in accepted):
+                return encoding
+        return b"identity"
+
+
+class RateCache:
+    def __init__(self, ttl: float = CACHE_TTL, max_stale: float = CACHE_MAX_STALE):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.entries = {}
+        self.in_flight = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_fetches = 0
+        self.background_refreshes = 0
+
+    async def get(self, currency: str) -> RateEntry:
+        entry = self.entries.get(currency)
+        if entry is not None:
+            expires_at, rate_entry = entry
+            now = time.monotonic()
+            if expires_at > now:
+                self.hits += 1
+                return rate_entry
+            if expires_at + self.max_stale > now:
+                self.stale_hits += 1
+                if currency not in self.in_flight:
+                    self.background_refreshes += 1
+                    self._start_load(currency)
+                return rate_entry
+
+        self.misses += 1
+        if currency in self.in_flight:
+            self.coalesced += 1
+        return await asyncio.shield(self._start_load(currency))
+
+    async def refresh(self, currency: str) -> RateEntry:
+        return await asyncio.shield(self._start_load(currency))
+
+    def _start_load(self, currency: str) -> asyncio.Task:
+        task = self.in_flight.get(currency)
+        if task is None:
+            task = asyncio.create_task(self._load(currency))
+            task.add_done_callback(_consume_exception)
+            self.in_flight[currency] = task
+        return task
+
+    async def _load(self, currency: str) -> RateEntry:
+        try:
+            self.upstream_fetches += 1
+            rate_entry = RateEntry(await fetch_currency_body(currency))
+            self.entries[currency] = (time.monotonic() + self.ttl, rate_entry)
+            return rate_entry
+        finally:
+            del self.in_flight[currency]
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "upstream_fetches": self.upstream_fetches,
+            "background_refreshes": self.background_refreshes,
+            "entries": len(self.entries),
+        }
+
+
+def _consume_exception(task: asyncio.Task):
+    if not task.cancelled():
+        task.exception()
+
+
+rate_cache = RateCache()
+
+
+class RateMatrix:
+    def __init__(self, source: RateEntry):
+        self.source = source
+        try:
+            data = json.loads(source.body)
+            self.base = data["base"].upper()
+            self.meta = {k: v for k, v in data.items() if k not in ("base", "rates")}
+            self.code_list = sorted(data["rates"])
+            base_rates = np.array(
+                [data["rates"][code] for code in self.code_list], dtype=np.float64
+            )
+        except (ValueError, KeyError, IndexError, AttributeError, TypeError) as e:
+            raise InvalidUpstreamBody(repr(e)) from e
+        self.index = {code: i for i, code in enumerate(self.code_list)}
+        matrix = base_rates[np.newaxis, :] / base_rates[:, np.newaxis]
+        self.matrix = np.array(
+            [float(format(rate, RATE_FORMAT)) for rate in matrix.ravel().tolist()]
+        ).reshape(matrix.shape)
+        if self.base in self.index:
+            self.matrix[self.index[self.base]] = base_rates
+        self.entries = {self.base: source}
+
+    def entry(self, currency: str) -> RateEntry:
+        rate_entry = self.entries.get(currency)
+        if rate_entry is None:
+            row = self.matrix[self.lookup_one(currency)].tolist()
+            payload = {
+                **self.meta,
+                "base": currency,
+                "rates": dict(zip(self.code_list, row)),
+            }
+            rate_entry = RateEntry(json.dumps(payload).encode())
+            self.entries[currency] = rate_entry
+        return rate_entry
+
+    def lookup_one(self, currency: str) -> int:
+        try:
+            return self.index[currency]
+        except KeyError:
+            raise UnknownCurrency(currency) from None
+
+    def lookup(self, currencies: list[str]) -> np.ndarray:
+        index = self.index
+        idx = np.fromiter(
+            (index.get(currency, -1) for currency in currencies),
+            dtype=np.intp,
+            count=len(currencies),
+        )
+        unknown = np.flatnonzero(idx < 0)
+        for i in unknown.tolist():
+            idx[i] = self.lookup_one(str(currencies[i]).upper())
+        return idx
+
+    def rate(self, from_currency: str, to_currency: str) -> float:
+        return float(
+            self.matrix[self.lookup_one(from_currency), self.lookup_one(to_currency)]
+        )
+
+    def convert(self, from_currencies, to_currencies, amounts) -> np.ndarray:
+        from_idx = self.lookup(from_currencies)
+        to_idx = self.lookup(to_currencies)
+        return np.asarray(amounts, dtype=np.float64) * self.matrix[from_idx, to_idx]
+
+
+def create_session() -> aiohttp.ClientSession:
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(ssl=False, limit=100, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=10),
+        raise_for_status=True,
+    )
+
+
+async def fetch_currency_body(currency: str) -> bytes:
+    url = API_URL.format(currency=currency)
+    async with session.get(url) as response:
+        return await response.read()
+
+
+async def get_rate_matrix() -> RateMatrix:
+    global rate_matrix
+    base_entry = await rate_cache.get(BASE_CURRENCY)
+    if rate_matrix is None or rate_matrix.source is not base_entry:
+        rate_matrix = RateMatrix(base_entry)
+    return rate_matrix
+
+
+async def get_rate_entry(currency: str) -> RateEntry:
+    if not DERIVE_RATES:
+        return await rate_cache.get(currency)
+    matrix = await get_rate_matrix()
+    return matrix.entry(currency)
+
+
+async def prefetch_rates(currencies: list[str], interval: float = PREFETCH_INTERVAL):
+    while True:
+        results = await asyncio.gather(
+            *[rate_cache.refresh(currency) for currency in currencies],
+            return_exceptions=True,
+        )
+        for currency, result in zip(currencies, results):
+            if isinstance(result, Exception):
+                print(f"Prefetch {currency} failed: {result!r}")
+        await asyncio.sleep(interval)
+
+
+async def lifespan(receive, send):
+    global session, prefetch_task
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            session = create_session()
+            currencies = [BASE_CURRENCY] if DERIVE_RATES else PREFETCH_CURRENCIES
+            if currencies:
+                prefetch_task = asyncio.create_task(prefetch_rates(currencies))
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if prefetch_task is not None:
+                prefetch_task.cancel()
+                await asyncio.gather(prefetch_task, return_exceptions=True)
+                prefetch_task = None
+            await session.close()
+            session = None
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def send_json(send, status: int, data: dict):
     await send(
         {
             "type": "http.response.start",
-            "status": 200,
+            "status": status,
             "headers": [[b"content-type", b"application/json"]],
         }
     )
@@ -35,5 +332,133 @@ async def app(scope, receive, send):
     )
 
 
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def string_list(value) -> list[str]:
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError("ожидается список строк")
+    return value
+
+
+def parse_amounts(value) -> np.ndarray:
+    if not isinstance(value, list) or not all(
+        isinstance(item, (int, float)) and not isinstance(item, bool) for item in value
+    ):
+        raise ValueError("ожидается список чисел")
+    amounts = np.asarray(value, dtype=np.float64)
+    if not np.isfinite(amounts).all():
+        raise ValueError("сумма должна быть конечным числом")
+    return amounts
+
+
+async def handle_convert(scope, receive, send):
+    if scope["method"] == "POST":
+        try:
+            conversions = json.loads(await read_body(receive))
+            if isinstance(conversions, dict):
+                from_currencies = string_list(conversions["from"])
+                to_currencies = string_list(conversions["to"])
+                amounts = parse_amounts(conversions["amount"])
+            else:
+                from_currencies = string_list([item["from"] for item in conversions])
+                to_currencies = string_list([item["to"] for item in conversions])
+                amounts = parse_amounts([item["amount"] for item in conversions])
+            matrix = await get_rate_matrix()
+            results = matrix.convert(from_currencies, to_currencies, amounts)
+        except (ValueError, KeyError, TypeError):
+            await send_json(send, 400, {"error": "invalid conversions"})
+            return
+        await send_json(send, 200, {"results": results.tolist()})
+        return
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    try:
+        from_currency = query["from"][0].upper()
+        to_currency = query["to"][0].upper()
+        amount = float(query.get("amount", ["1"])[0])
+        if not math.isfinite(amount):
+            raise ValueError(amount)
+    except (KeyError, ValueError):
+        await send_json(send, 400, {"error": "from, to and amount are required"})
+        return
+    matrix = await get_rate_matrix()
+    rate = matrix.rate(from_currency, to_currency)
+    await send_json(
+        send,
+        200,
+        {
+            "from": from_currency,
+            "to": to_currency,
+            "amount": amount,
+            "rate": rate,
+            "result": amount * rate,
+        },
+    )
+
+
+async def send_entry(send, rate_entry: RateEntry, request_headers: dict):
+    if_none_match = request_headers.get(b"if-none-match")
+    if if_none_match is not None and rate_entry.matches(if_none_match):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 304,
+                "headers": rate_entry.not_modified_headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    encoding = rate_entry.negotiate(request_headers.get(b"accept-encoding", b""))
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": rate_entry.headers[encoding],
+        }
+    )
+    await send({"type": "http.response.body", "body": rate_entry.variants[encoding]})
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+
+    if scope["path"] == "/favicon.ico":
+        return
+
+    if scope["path"] == "/stats":
+        await send_json(send, 200, rate_cache.stats())
+        return
+
+    try:
+        if scope["path"] == "/convert":
+            await handle_convert(scope, receive, send)
+            return
+        currency = unquote(scope["path"].strip("/")).upper()
+        rate_entry = await get_rate_entry(currency)
+    except UnknownCurrency as e:
+        await send_json(send, 404, {"error": "unknown currency", "codes": e.args})
+        return
+    except aiohttp.ClientResponseError as e:
+        await send_json(send, e.status, {"error": e.message})
+        return
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        await send_json(send, 502, {"error": "upstream unavailable"})
+        return
+    except InvalidUpstreamBody:
+        await send_json(send, 502, {"error": "invalid upstream response"})
+        return
+    await send_entry(send, rate_entry, dict(scope["headers"]))
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
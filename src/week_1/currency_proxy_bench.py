@@ -0,0 +1,148 @@
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+
+import currency_proxy
+
+UPSTREAM_LATENCY = 0.05
+CURRENCIES = ["USD", "EUR", "RUB", "GBP", "JPY", "CNY"]
+ALL_CODES = CURRENCIES + [f"{chr(65 + i // 26)}{chr(65 + i % 26)}X" for i in range(154)]
+
+
+def make_payload(currency: str) -> dict:
+    return {
+        "base": currency,
+        "date": time.strftime("%Y-%m-%d"),
+        "time_last_updated": int(time.time()),
+        "rates": {code: 1.0 + i / 10 for i, code in enumerate(ALL_CODES)},
+    }
+
+
+async def start_stub_upstream(latency: float = UPSTREAM_LATENCY):
+    counter = {"requests": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        counter["requests"] += 1
+        await asyncio.sleep(latency)
+        return web.json_response(make_payload(request.match_info["currency"]))
+
+    stub = web.Application()
+    stub.router.add_get("/v4/latest/{currency}", handle)
+    runner = web.AppRunner(stub)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v4/latest/{{currency}}", counter
+
+
+async def legacy_app(scope, receive, send):
+    currency = scope["path"].strip("/").upper()
+    url = currency_proxy.API_URL.format(currency=currency)
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(ssl=False)
+    ) as session:
+        async with session.get(url) as response:
+            data = await response.json()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [[b"content-type", b"application/json"]],
+        }
+    )
+    await send({"type": "http.response.body", "body": json.dumps(data).encode()})
+
+
+async def timed_request(asgi_app, path: str) -> float:
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    await asgi_app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def percentile(latencies: list[float], pct: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_scenario(asgi_app, rounds: int, concurrency: int) -> list[float]:
+    latencies = []
+    for i in range(rounds):
+        path = "/" + CURRENCIES[i % len(CURRENCIES)]
+        latencies.extend(
+            await asyncio.gather(
+                *[timed_request(asgi_app, path) for _ in range(concurrency)]
+            )
+        )
+    return latencies
+
+
+def bench_bulk_convert(matrix, size: int = 100_000):
+    codes = matrix.code_list
+    from_currencies = [codes[i % len(codes)] for i in range(size)]
+    to_currencies = [codes[(i * 7) % len(codes)] for i in range(size)]
+    amounts = [float(i) for i in range(size)]
+
+    start = time.perf_counter()
+    looped = [
+        amount * matrix.rate(from_currency, to_currency)
+        for from_currency, to_currency, amount in zip(
+            from_currencies, to_currencies, amounts
+        )
+    ]
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = matrix.convert(from_currencies, to_currencies, amounts)
+    vectorized_time = time.perf_counter() - start
+
+    assert vectorized.tolist() == looped
+    print(
+        f"bulk convert x{size}: loop={loop_time * 1000:.1f}ms "
+        f"vectorized={vectorized_time * 1000:.1f}ms"
+    )
+
+
+async def main(rounds: int = 12, concurrency: int = 1000):
+    runner, url, counter = await start_stub_upstream()
+    currency_proxy.API_URL = url
+    try:
+        scenarios = [
+            ("legacy", legacy_app, False),
+            ("passthrough", currency_proxy.app, False),
+            ("derived", currency_proxy.app, True),
+        ]
+        currency_proxy.session = currency_proxy.create_session()
+        for name, asgi_app, derive in scenarios:
+            counter["requests"] = 0
+            currency_proxy.DERIVE_RATES = derive
+            currency_proxy.rate_cache = currency_proxy.RateCache()
+            currency_proxy.rate_matrix = None
+            latencies = await run_scenario(asgi_app, rounds, concurrency)
+            print(
+                f"{name:>14}: p50={percentile(latencies, 50) * 1000:8.2f}ms "
+                f"p99={percentile(latencies, 99) * 1000:8.2f}ms "
+                f"mean={statistics.mean(latencies) * 1000:8.2f}ms "
+                f"upstream={counter['requests']}"
+            )
+            print(f"{'cache':>14}: {currency_proxy.rate_cache.stats()}")
+        bench_bulk_convert(await currency_proxy.get_rate_matrix())
+        await currency_proxy.session.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,196 @@
+import itertools
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+import search
+
+MAGIC = b"SORTIDX1"
+HEADER = struct.Struct("<8sQQQ")
+DTYPE = np.dtype("<i8")
+PAGE_STRIDE = 4096 // DTYPE.itemsize
+
+
+def read_numbers(file_path: str):
+    with open(file_path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield int(line)
+
+
+def iterate_chunks(numbers, chunk_size: int):
+    numbers = iter(numbers)
+    while True:
+        chunk = np.fromiter(itertools.islice(numbers, chunk_size), dtype=DTYPE)
+        if not len(chunk):
+            return
+        yield chunk
+
+
+def merge_runs(runs: list[np.ndarray], block_size: int):
+    positions = [0] * len(runs)
+    while True:
+        active = [i for i, run in enumerate(runs) if positions[i] < len(run)]
+        if not active:
+            return
+        threshold = min(
+            runs[i][min(positions[i] + block_size, len(runs[i])) - 1] for i in active
+        )
+        parts = []
+        for i in active:
+            block = runs[i][positions[i] : positions[i] + block_size]
+            take = int(np.searchsorted(block, threshold, side="right"))
+            parts.append(block[:take])
+            positions[i] += take
+        merged = np.concatenate(parts)
+        merged.sort()
+        yield merged
+
+
+def build_index_from_chunks(
+    chunks, path: str, stride: int = PAGE_STRIDE, block_size: int = 1 << 20
+) -> int:
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(path) or ".") as tmp_dir:
+        run_paths = []
+        for chunk in chunks:
+            chunk = np.sort(np.asarray(chunk, dtype=DTYPE))
+            run_path = os.path.join(tmp_dir, f"run_{len(run_paths)}.bin")
+            chunk.tofile(run_path)
+            run_paths.append(run_path)
+
+        runs = [
+            np.memmap(run_path, dtype=DTYPE, mode="r")
+            for run_path in run_paths
+            if os.path.getsize(run_path)
+        ]
+        count = 0
+        fence = []
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, 0, stride, 0))
+            blocks = runs if len(runs) == 1 else merge_runs(runs, block_size)
+            for block in blocks:
+                fence.append(np.array(block[-count % stride :: stride]))
+                np.asarray(block).tofile(f)
+                count += len(block)
+            fence = np.concatenate(fence) if fence else np.empty(0, dtype=DTYPE)
+            fence.astype(DTYPE).tofile(f)
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, count, stride, len(fence)))
+        del runs
+    os.replace(tmp_path, path)
+    return count
+
+
+def build_index(
+    numbers, path: str, chunk_size: int = 1 << 24, stride: int = PAGE_STRIDE
+) -> int:
+    return build_index_from_chunks(iterate_chunks(numbers, chunk_size), path, stride)
+
+
+class DiskIndex:
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size or not header.startswith(MAGIC):
+            self.file.close()
+            raise ValueError(f"{path} is not a sorted index file")
+        _, self.count, self.stride, fence_count = HEADER.unpack(header)
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self.buffer, "madvise"):
+            self.buffer.madvise(mmap.MADV_RANDOM)
+        self.values = np.frombuffer(
+            self.buffer, dtype=DTYPE, count=self.count, offset=HEADER.size
+        )
+        self.fence = np.frombuffer(
+            self.buffer,
+            dtype=DTYPE,
+            count=fence_count,
+            offset=HEADER.size + self.count * DTYPE.itemsize,
+        ).copy()
+
+    def lower_bound(self, number: int) -> int:
+        page = int(self.fence.searchsorted(number)) - 1
+        if page < 0:
+            return 0
+        start = page * self.stride
+        return start + int(
+            self.values[start : start + self.stride].searchsorted(number)
+        )
+
+    def search(self, number: int) -> bool:
+        index = self.lower_bound(number)
+        return index < self.count and self.values[index] == number
+
+    def search_many(self, queries) -> np.ndarray:
+        return search.search_many(self.values, queries, sort_queries=True)
+
+    def __contains__(self, number: int) -> bool:
+        return self.search(number)
+
+    def close(self):
+        if self.buffer.closed:
+            return
+        del self.values
+        self.buffer.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = os.path.join(tmp_dir, "numbers.idx")
+
+        numbers = rng.integers(-500, 50_000, 20_000).tolist()
+        count = build_index(iter(numbers), index_path, chunk_size=3000, stride=64)
+        assert count == len(numbers)
+        expected = sorted(numbers)
+        queries = rng.integers(-600, 50_100, 2000).tolist()
+        with DiskIndex(index_path) as index:
+            assert index.values.tolist() == expected
+            assert index.fence.tolist() == expected[::64]
+            for query in queries:
+                assert index.search(query) == search.search(expected, query)
+                assert index.lower_bound(query) == search.lower_bound(expected, query)
+            found = index.search_many(queries)
+        assert found.tolist() == [search.search(expected, query) for query in queries]
+        assert index.file.closed
+        index.close()
+
+        duplicates_path = os.path.join(tmp_dir, "duplicates.idx")
+        build_index([7] * 300 + [1, 9], duplicates_path, chunk_size=100, stride=16)
+        with DiskIndex(duplicates_path) as duplicates:
+            assert duplicates.lower_bound(7) == 1
+            assert 7 in duplicates and 8 not in duplicates and 9 in duplicates
+
+        text_path = os.path.join(tmp_dir, "numbers.txt")
+        with open(text_path, "w") as f:
+            f.write("5\n3\n\n8\n")
+        build_index(read_numbers(text_path), index_path)
+        with DiskIndex(index_path) as index:
+            assert index.values.tolist() == [3, 5, 8]
+
+        empty_path = os.path.join(tmp_dir, "empty.idx")
+        build_index([], empty_path)
+        with DiskIndex(empty_path) as empty:
+            assert not empty.search(1)
+
+        try:
+            DiskIndex(text_path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError
@@ -0,0 +1,72 @@
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from disk_index import DiskIndex, build_index_from_chunks
+
+QUERIES = 100_000
+CHUNK_SIZE = 1 << 24
+
+
+def memory_kb() -> dict:
+    memory = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "RssAnon:", "RssFile:")):
+                name, value, _ = line.split()
+                memory[name[:-1]] = int(value)
+    return memory
+
+
+def random_chunks(size: int, rng: np.random.Generator):
+    for start in range(0, size, CHUNK_SIZE):
+        yield rng.integers(0, 4 * size, min(CHUNK_SIZE, size - start), dtype=np.int64)
+
+
+def bench(size: int, directory: str):
+    rng = np.random.default_rng(1)
+    path = os.path.join(directory, f"bench_{size}.idx")
+
+    start = time.perf_counter()
+    build_index_from_chunks(random_chunks(size, rng), path)
+    build = time.perf_counter() - start
+
+    before = memory_kb()
+    with DiskIndex(path) as index:
+        queries = rng.integers(0, 4 * size, QUERIES, dtype=np.int64)
+
+        start = time.perf_counter()
+        found = [index.search(query) for query in queries.tolist()[:10_000]]
+        point = (time.perf_counter() - start) / len(found) * 1e9
+        after_point = memory_kb()
+
+        start = time.perf_counter()
+        batch_found = index.search_many(queries)
+        batch = (time.perf_counter() - start) / QUERIES * 1e9
+        assert batch_found[: len(found)].tolist() == found
+        after_batch = memory_kb()
+
+    print(f"\n--- n = {size:.0e} ---")
+    print(f"сборка: {build:.1f}s, файл {os.path.getsize(path) / 2**20:.0f} MB")
+    print(f"в памяти как list[int]: ~{size * 36 / 2**20:.0f} MB")
+    print(
+        f"search: {point:.0f} нс/запрос, RssAnon +"
+        f"{(after_point['RssAnon'] - before['RssAnon']) / 1024:.1f} MB, RssFile +"
+        f"{(after_point['RssFile'] - before['RssFile']) / 1024:.1f} MB"
+    )
+    print(
+        f"search_many: {batch:.0f} нс/запрос, RssAnon +"
+        f"{(after_batch['RssAnon'] - before['RssAnon']) / 1024:.1f} MB, RssFile +"
+        f"{(after_batch['RssFile'] - before['RssFile']) / 1024:.1f} MB"
+    )
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    for exponent in range(6, max_exponent + 1):
+        bench(10**exponent, directory)
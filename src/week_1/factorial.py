@@ -0,0 +1,107 @@
+import math
+
+CHECKPOINT_LIMIT = 1000
+CHECKPOINT_STEP = 32
+SMALL_RANGE = 16
+
+
+def factorial_naive(n: int) -> int:
+    result = 1
+    for i in range(1, n + 1):
+        result *= i
+    return result
+
+
+def product_range(low: int, high: int) -> int:
+    if high - low <= SMALL_RANGE:
+        result = 1
+        for i in range(low + 1, high + 1):
+            result *= i
+        return result
+    middle = (low + high) // 2
+    return product_range(low, middle) * product_range(middle, high)
+
+
+def factorial_binary_split(n: int) -> int:
+    if n < 0:
+        raise ValueError("factorial() not defined for negative values")
+    return product_range(0, n)
+
+
+class CheckpointTable:
+    def __init__(self, limit: int = CHECKPOINT_LIMIT, step: int = CHECKPOINT_STEP):
+        self.limit = limit
+        self.step = step
+        self.checkpoints = [1]
+        for i in range(1, limit // step + 1):
+            self.checkpoints.append(
+                self.checkpoints[-1] * product_range((i - 1) * step, i * step)
+            )
+
+    def factorial(self, n: int) -> int:
+        if n < 0:
+            raise ValueError("factorial() not defined for negative values")
+        if n > self.limit:
+            return math.factorial(n)
+        base = n // self.step
+        return self.checkpoints[base] * product_range(base * self.step, n)
+
+
+checkpoint_table = None
+
+
+def factorial_checkpoint(n: int) -> int:
+    global checkpoint_table
+    if checkpoint_table is None:
+        checkpoint_table = CheckpointTable()
+    return checkpoint_table.factorial(n)
+
+
+STRATEGIES = {
+    "naive": factorial_naive,
+    "binary_split": factorial_binary_split,
+    "checkpoint": factorial_checkpoint,
+    "math": math.factorial,
+}
+
+
+def factorial(n: int, strategy: str = "checkpoint") -> int:
+    return STRATEGIES[strategy](n)
+
+
+def factorial_many(numbers, strategy: str = "chain") -> list[int]:
+    numbers = list(numbers)
+    distinct = sorted(set(numbers))
+    if strategy == "chain":
+        results = {}
+        previous, value = 0, 1
+        for n in distinct:
+            if n < 0:
+                raise ValueError("factorial() not defined for negative values")
+            value *= product_range(previous, n)
+            results[n] = value
+            previous = n
+    else:
+        func = STRATEGIES[strategy]
+        results = {n: func(n) for n in distinct}
+    return [results[n] for n in numbers]
+
+
+if __name__ == "__main__":
+    for n in list(range(0, 70)) + [255, 256, 999, 1000, 1001, 2500]:
+        expected = math.factorial(n)
+        for strategy in STRATEGIES:
+            assert factorial(n, strategy) == expected, (n, strategy)
+
+    numbers = [5, 0, 1000, 5, 3, 999, 0]
+    expected = [math.factorial(n) for n in numbers]
+    assert factorial_many(numbers) == expected
+    assert factorial_many(numbers, "binary_split") == expected
+    assert factorial_many([]) == []
+
+    try:
+        factorial_many([3, -1])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError
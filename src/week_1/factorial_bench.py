@@ -0,0 +1,31 @@
+import random
+import time
+
+from factorial import STRATEGIES, factorial, factorial_many
+
+
+def bench_single(size: int = 5000):
+    data = [random.randint(0, 1000) for _ in range(size)]
+    print(f"\n--- {size} вызовов factorial(n), n в 0..1000 ---")
+    baseline = None
+    for strategy in STRATEGIES:
+        start = time.perf_counter()
+        for n in data:
+            factorial(n, strategy)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{strategy:>14}: {elapsed:.3f}s, x{baseline / elapsed:.1f}")
+
+
+def bench_batch(size: int = 20_000):
+    data = [random.randint(0, 1000) for _ in range(size)]
+    print(f"\n--- factorial_many, {size} чисел, {len(set(data))} различных ---")
+    for strategy in ["chain", *STRATEGIES]:
+        start = time.perf_counter()
+        factorial_many(data, strategy)
+        print(f"{strategy:>14}: {time.perf_counter() - start:.4f}s")
+
+
+if __name__ == "__main__":
+    bench_single()
+    bench_batch()
@@ -0,0 +1,266 @@
+import asyncio
+import collections
+import contextlib
+import json
+import sys
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKET_COUNT = 64 * SUB_BUCKETS
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds: float):
+        value = int(seconds * 1_000_000)
+        if value >= 2 * SUB_BUCKETS:
+            shift = value.bit_length() - SUB_BUCKET_BITS - 1
+            self.counts[(shift << SUB_BUCKET_BITS) + (value >> shift)] += 1
+        elif value > 0:
+            self.counts[value] += 1
+        else:
+            value = 0
+            self.counts[0] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @staticmethod
+    def bucket_value(index: int) -> int:
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        low = (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+        return low + (1 << shift) // 2
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, round(self.count * pct / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(self.bucket_value(index), self.max) / 1000
+        return self.max / 1000
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count / 1000, 3) if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": self.max / 1000,
+        }
+
+
+def url_host(url: str) -> str:
+    parts = url.split("/", 3)
+    if len(parts) > 2 and parts[0].endswith(":") and not parts[1]:
+        return parts[2]
+    return urlsplit(url).netloc
+
+
+class HostStats:
+    __slots__ = ("requests", "latency_total", "status")
+
+    def __init__(self):
+        self.requests = 0
+        self.latency_total = 0.0
+        self.status = collections.Counter()
+
+
+class FetchMetrics:
+    def __init__(self, queue_depth=None, trace_sample: int = 16):
+        self.queue_depth = queue_depth
+        self.trace_sample = trace_sample
+        self.traced_session = None
+        self.started_at = time.monotonic()
+        self.started = 0
+        self.completed = 0
+        self.origins = {}
+        self.latency = LatencyHistogram()
+        self.dns = LatencyHistogram()
+        self.connect = LatencyHistogram()
+        self.ttfb = LatencyHistogram()
+        self.last_snapshot = (self.started_at, 0)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.request_start = time.monotonic()
+
+        async def on_request_end(session, ctx, params):
+            self.ttfb.record(time.monotonic() - ctx.request_start)
+
+        async def on_dns_resolvehost_start(session, ctx, params):
+            ctx.dns_start = time.monotonic()
+
+        async def on_dns_resolvehost_end(session, ctx, params):
+            self.dns.record(time.monotonic() - ctx.dns_start)
+
+        async def on_connection_create_start(session, ctx, params):
+            ctx.connect_start = time.monotonic()
+
+        async def on_connection_create_end(session, ctx, params):
+            self.connect.record(time.monotonic() - ctx.connect_start)
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    @contextlib.asynccontextmanager
+    async def tracing(self, session: aiohttp.ClientSession):
+        self.traced_session = aiohttp.ClientSession(
+            connector=session.connector,
+            connector_owner=False,
+            timeout=session.timeout,
+            trace_configs=[self.trace_config()],
+        )
+        try:
+            yield self
+        finally:
+            await self.traced_session.close()
+            self.traced_session = None
+
+    def pick_session(self, session: aiohttp.ClientSession) -> aiohttp.ClientSession:
+        if self.traced_session is not None and self.started % self.trace_sample == 0:
+            return self.traced_session
+        return session
+
+    def request_started(self) -> float:
+        self.started += 1
+        return time.monotonic()
+
+    def request_finished(self, url: str, status: int | None, started: float):
+        latency = time.monotonic() - started
+        self.completed += 1
+        self.latency.record(latency)
+
+        end = url.find("/", 8)
+        key = (url if end < 0 else url[:end], status)
+        totals = self.origins.get(key)
+        if totals is None:
+            self.origins[key] = [1, latency]
+        else:
+            totals[0] += 1
+            totals[1] += latency
+
+    @property
+    def status(self) -> collections.Counter:
+        status = collections.Counter()
+        for (_, code), (requests, _) in self.origins.items():
+            status[code] += requests
+        return status
+
+    @property
+    def hosts(self) -> dict:
+        hosts = {}
+        for (origin, code), (requests, latency_total) in self.origins.items():
+            host = url_host(origin)
+            host_stats = hosts.get(host)
+            if host_stats is None:
+                host_stats = hosts[host] = HostStats()
+            host_stats.requests += requests
+            host_stats.latency_total += latency_total
+            host_stats.status[code] += requests
+        return hosts
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        last_time, last_completed = self.last_snapshot
+        self.last_snapshot = (now, self.completed)
+        return {
+            "time": time.time(),
+            "elapsed": round(now - self.started_at, 3),
+            "completed": self.completed,
+            "in_flight": self.started - self.completed,
+            "queue_depth": self.queue_depth() if self.queue_depth else None,
+            "rps": round((self.completed - last_completed) / (now - last_time), 1),
+            "latency_ms": self.latency.summary(),
+        }
+
+    def summary(self) -> dict:
+        elapsed = time.monotonic() - self.started_at
+        return {
+            "elapsed": round(elapsed, 3),
+            "completed": self.completed,
+            "rps": round(self.completed / elapsed, 1) if elapsed else 0.0,
+            "status": {str(status): n for status, n in self.status.items()},
+            "latency_ms": self.latency.summary(),
+            "dns_ms": self.dns.summary(),
+            "connect_ms": self.connect.summary(),
+            "ttfb_ms": self.ttfb.summary(),
+            "trace_sample": self.trace_sample,
+            "hosts": {
+                host: {
+                    "requests": stats.requests,
+                    "mean_latency_ms": round(
+                        stats.latency_total / stats.requests * 1000, 3
+                    ),
+                    "status": {str(s): n for s, n in stats.status.items()},
+                }
+                for host, stats in self.hosts.items()
+            },
+        }
+
+    def emit(self, snapshot: dict, output=None):
+        if output is not None:
+            output.write(json.dumps(snapshot) + "\n")
+            output.flush()
+            return
+        latency = snapshot["latency_ms"]
+        print(
+            f"[{snapshot['elapsed']:8.1f}s] {snapshot['completed']} готово, "
+            f"{snapshot['in_flight']} в работе, очередь {snapshot['queue_depth']}, "
+            f"{snapshot['rps']} req/s, p50={latency['p50']}ms p99={latency['p99']}ms",
+            file=sys.stderr,
+        )
+
+    async def report(self, interval: float = 1.0, path: str | None = None):
+        output = open(path, "a") if path else None
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                self.emit(self.snapshot(), output)
+        finally:
+            if output is not None:
+                output.close()
+
+    def print_summary(self, path: str | None = None):
+        summary = self.summary()
+        if path:
+            with open(path, "a") as f:
+                f.write(json.dumps({"summary": summary}) + "\n")
+            return
+        print(
+            f"Итого: {summary['completed']} запросов за {summary['elapsed']}s "
+            f"({summary['rps']} req/s)",
+            file=sys.stderr,
+        )
+        print(f"Статусы: {summary['status']}", file=sys.stderr)
+        for name in ("latency_ms", "dns_ms", "connect_ms", "ttfb_ms"):
+            print(f"{name}: {summary[name]}", file=sys.stderr)
+        for host, stats in sorted(
+            summary["hosts"].items(), key=lambda item: -item[1]["requests"]
+        ):
+            print(f"  {host}: {stats}", file=sys.stderr)
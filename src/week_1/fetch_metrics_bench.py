@@ -0,0 +1,74 @@
+import asyncio
+import multiprocessing as mp
+import socket
+import statistics
+import sys
+import time
+
+from aiohttp import web
+
+from fetch_metrics import FetchMetrics
+from fetch_urls import stream_urls
+
+
+def serve_stub(port: int):
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(body=b"{}", content_type="application/json")
+
+    stub = web.Application()
+    stub.router.add_get("/{tail:.*}", handle)
+    web.run_app(stub, host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+def start_stub_server(port: int = 18765) -> mp.Process:
+    process = mp.Process(target=serve_stub, args=(port,), daemon=True)
+    process.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return process
+
+
+async def run(urls: list[str], metrics: FetchMetrics | None) -> float:
+    start = time.process_time()
+    async for _ in stream_urls(urls, concurrency=200, metrics=metrics):
+        pass
+    return (time.process_time() - start) / len(urls) * 1_000_000
+
+
+def bookkeeping_cost(urls: list[str]) -> float:
+    metrics = FetchMetrics()
+    start = time.process_time()
+    for url in urls:
+        metrics.request_finished(url, 200, metrics.request_started())
+    return (time.process_time() - start) / len(urls) * 1_000_000
+
+
+async def main(requests: int = 20000, trials: int = 10):
+    server = start_stub_server()
+    urls = [f"http://127.0.0.1:18765/{i}" for i in range(requests)]
+    try:
+        await run(urls[:1000], None)
+        plain = []
+        instrumented = []
+        for _ in range(trials):
+            plain.append(await run(urls, None))
+            metrics = FetchMetrics()
+            instrumented.append(await run(urls, metrics))
+        best_plain = statistics.median(plain)
+        best_instrumented = statistics.median(instrumented)
+        overhead = (best_instrumented - best_plain) / best_plain * 100
+        print(f"без метрик:  {best_plain:7.1f} мкс CPU/запрос")
+        print(f"с метриками: {best_instrumented:7.1f} мкс CPU/запрос")
+        print(f"накладные расходы: {overhead:.2f}%")
+        print(f"учёт без сети: {bookkeeping_cost(urls):.2f} мкс CPU/запрос")
+        print(metrics.summary()["latency_ms"])
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
@@ -1,6 +1,12 @@
 import asyncio
 import aiohttp
+import contextlib
 import json
+import os
+import sys
+
+from fetch_metrics import FetchMetrics
+from host_scheduler import RETRY_STATUSES, HostScheduler, create_connector
 
 urls = [
     "https://example.com",
@@ -9,23 +15,39 @@ urls = [
 ]
 
 
+async def check_url(
+    session: aiohttp.ClientSession,
+    url: str,
+    scheduler: HostScheduler,
+    retries: int = 2,
+    metrics: FetchMetrics | None = None,
+) -> dict:
+    started = metrics.request_started() if metrics else None
+    request_session = metrics.pick_session(session) if metrics else session
+    for attempt in range(retries + 1):
+        try:
+            async with scheduler.request(
+                request_session, url, timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                status_code = response.status
+        except Exception:
+            status_code = 0
+        if status_code not in RETRY_STATUSES or attempt == retries:
+            if metrics:
+                metrics.request_finished(url, status_code, started)
+            return {"url": url, "status_code": status_code}
+
+
 async def fetch_urls(
     urls: list[str], file_path: str, slice_size: int = 100
 ) -> list[dict]:
-    semaphore = asyncio.Semaphore(5)
+    scheduler = HostScheduler()
     all_results = []
 
-    async with aiohttp.ClientSession(
-        connector=aiohttp.TCPConnector(ssl=False)
-    ) as session:
+    async with aiohttp.ClientSession(connector=create_connector()) as session:
 
         async def process_url(url):
-            async with semaphore:
-                try:
-                    async with session.get(url, timeout=10) as response:
-                        return {"url": url, "status_code": response.status}
-                except Exception:
-                    return {"url": url, "status_code": 0}
+            return await check_url(session, url, scheduler)
 
         with open(file_path, "w") as f:
             for i in range(0, len(urls), slice_size):
@@ -40,5 +62,166 @@ async def fetch_urls(
         return all_results
 
 
+def read_urls(file_path: str):
+    with open(file_path) as f:
+        for line in f:
+            url = line.strip()
+            if url:
+                yield url
+
+
+async def iterate_urls(urls):
+    if hasattr(urls, "__aiter__"):
+        async for url in urls:
+            yield url
+    else:
+        for url in urls:
+            yield url
+
+
+class Checkpoint:
+    def __init__(self, path: str, save_every: int = 1000):
+        self.path = path
+        self.save_every = save_every
+        self.position = 0
+        self.done = set()
+        self.unsaved = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                state = json.load(f)
+            self.position = state["position"]
+            self.done = set(state["done"])
+
+    @property
+    def started(self) -> bool:
+        return self.position > 0 or bool(self.done)
+
+    def is_done(self, index: int) -> bool:
+        return index < self.position or index in self.done
+
+    def mark(self, index: int) -> bool:
+        self.done.add(index)
+        while self.position in self.done:
+            self.done.remove(self.position)
+            self.position += 1
+        self.unsaved += 1
+        return self.unsaved >= self.save_every
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"position": self.position, "done": sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+        self.unsaved = 0
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def stream_urls(
+    urls,
+    concurrency: int = 100,
+    skip=None,
+    scheduler: HostScheduler | None = None,
+    metrics: FetchMetrics | None = None,
+):
+    scheduler = scheduler or HostScheduler()
+    async with (
+        aiohttp.ClientSession(connector=create_connector(limit=concurrency)) as session,
+        metrics.tracing(session) if metrics else contextlib.nullcontext(),
+    ):
+
+        async def process_url(index, url):
+            return index, await check_url(session, url, scheduler, metrics=metrics)
+
+        source = iterate_urls(urls)
+        index = -1
+        pending = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < concurrency:
+                    try:
+                        url = await anext(source)
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    index += 1
+                    if skip is not None and skip(index):
+                        continue
+                    pending.add(asyncio.create_task(process_url(index, url)))
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await source.aclose()
+
+
+async def fetch_urls_streaming(
+    urls,
+    file_path: str,
+    concurrency: int = 100,
+    checkpoint_path: str | None = None,
+    metrics_interval: float | None = None,
+    metrics_file: str | None = None,
+) -> int:
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+    skip = checkpoint.is_done if checkpoint else None
+    mode = "a" if checkpoint and checkpoint.started else "w"
+    count = 0
+
+    metrics = None
+    reporter = None
+    if metrics_interval:
+        metrics = FetchMetrics()
+        reporter = asyncio.create_task(metrics.report(metrics_interval, metrics_file))
+
+    with open(file_path, mode) as f:
+        try:
+            async for index, result in stream_urls(
+                urls, concurrency, skip, metrics=metrics
+            ):
+                f.write(json.dumps(result) + "\n")
+                count += 1
+                if checkpoint and checkpoint.mark(index):
+                    f.flush()
+                    checkpoint.save()
+        except BaseException:
+            if checkpoint:
+                f.flush()
+                checkpoint.save()
+            raise
+        finally:
+            if reporter:
+                reporter.cancel()
+                await asyncio.gather(reporter, return_exceptions=True)
+                metrics.print_summary(metrics_file)
+
+    if checkpoint:
+        checkpoint.remove()
+    return count
+
+
 if __name__ == "__main__":
-    asyncio.run(fetch_urls(urls, "./results.json"))
+    if len(sys.argv) > 2:
+        asyncio.run(
+            fetch_urls_streaming(
+                read_urls(sys.argv[1]),
+                sys.argv[2],
+                concurrency=int(sys.argv[3]) if len(sys.argv) > 3 else 100,
+                checkpoint_path=sys.argv[2] + ".checkpoint",
+                metrics_interval=5.0,
+            )
+        )
+    else:
+        asyncio.run(fetch_urls(urls, "./results.json"))
@@ -0,0 +1,94 @@
+import asyncio
+import collections
+import random
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+from fetch_urls import stream_urls
+
+HOSTS = [
+    {"latency": 0.01, "capacity": 50},
+    {"latency": 0.05, "capacity": 20},
+    {"latency": 0.2, "capacity": 100},
+    {"latency": 0.02, "capacity": 4},
+]
+
+
+async def start_stub_host(latency: float, capacity: int):
+    state = {"in_flight": 0, "rejected": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        if state["in_flight"] >= capacity:
+            state["rejected"] += 1
+            return web.Response(status=429, headers={"Retry-After": "0.2"})
+        state["in_flight"] += 1
+        try:
+            await asyncio.sleep(latency * random.uniform(0.8, 1.2))
+            return web.json_response({"path": request.path})
+        finally:
+            state["in_flight"] -= 1
+
+    stub = web.Application()
+    stub.router.add_get("/{tail:.*}", handle)
+    runner = web.AppRunner(stub)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", state
+
+
+async def global_semaphore_baseline(urls: list[str]) -> list[dict]:
+    semaphore = asyncio.Semaphore(5)
+
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(ssl=False)
+    ) as session:
+
+        async def process_url(url):
+            async with semaphore:
+                try:
+                    async with session.get(url, timeout=10) as response:
+                        return {"url": url, "status_code": response.status}
+                except Exception:
+                    return {"url": url, "status_code": 0}
+
+        return await asyncio.gather(*[process_url(url) for url in urls])
+
+
+async def adaptive(urls: list[str]) -> list[dict]:
+    return [result async for _, result in stream_urls(urls, concurrency=200)]
+
+
+async def main(requests_per_host: int = 500):
+    hosts = [await start_stub_host(**host) for host in HOSTS]
+    urls = [
+        f"{base_url}/{i}" for i in range(requests_per_host) for _, base_url, _ in hosts
+    ]
+    random.shuffle(urls)
+    try:
+        for name, runner in [
+            ("global Semaphore(5)", global_semaphore_baseline),
+            ("per-host AIMD", adaptive),
+        ]:
+            for _, _, state in hosts:
+                state["rejected"] = 0
+            start = time.perf_counter()
+            results = await runner(urls)
+            elapsed = time.perf_counter() - start
+            statuses = collections.Counter(r["status_code"] for r in results)
+            rejected = sum(state["rejected"] for _, _, state in hosts)
+            print(
+                f"{name:>20}: {elapsed:6.2f}s {len(urls) / elapsed:8.1f} req/s "
+                f"statuses={dict(statuses)} upstream_429={rejected}"
+            )
+    finally:
+        for runner, _, _ in hosts:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
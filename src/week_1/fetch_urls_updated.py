@@ -1,84 +1,609 @@
+import argparse
 import asyncio
+import codecs
+import contextlib
+import gzip
 import json
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+import zlib
 from pathlib import Path
+from urllib.parse import urlsplit
 
 import aiohttp
 
+from fetch_metrics import FetchMetrics
+from host_scheduler import RETRY_STATUSES, HostScheduler, create_connector
 
-async def fetch_urls(input_file: str) -> None:
-    output_file = "result.jsonl"
-    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+FSYNC_POLICIES = ("never", "batch", "close")
+CODECS = ("orjson", "msgspec", "json")
+MAX_BODY_SIZE = 10 * 1024 * 1024
+
+
+class JsonCodec:
+    def __init__(self, name: str, loads, dumps):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+
+def reject_constant(name: str):
+    raise ValueError(f"Недопустимое значение JSON: {name}")
+
+
+def json_loads(data: bytes):
+    return json.loads(data, parse_constant=reject_constant)
+
+
+def json_dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False).encode()
+
+
+def orjson_loads(data: bytes):
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json_loads(data)
+
+
+def orjson_dumps(obj) -> bytes:
+    try:
+        return orjson.dumps(obj)
+    except orjson.JSONEncodeError:
+        return json_dumps(obj)
+
+
+def get_codec(name: str | None = None) -> JsonCodec:
+    if name is None:
+        name = "orjson" if orjson else "msgspec" if msgspec else "json"
+    if name == "orjson":
+        if orjson is None:
+            raise RuntimeError("Пакет orjson не установлен")
+        return JsonCodec(name, orjson_loads, orjson_dumps)
+    if name == "msgspec":
+        if msgspec is None:
+            raise RuntimeError("Пакет msgspec не установлен")
+        return JsonCodec(name, msgspec.json.decode, msgspec.json.encode)
+    if name == "json":
+        return JsonCodec(name, json_loads, json_dumps)
+    raise ValueError(f"Неизвестный кодек: {name}")
 
-    url_queue = asyncio.Queue()
 
-    semaphore = asyncio.Semaphore(5)
+def build_record(codec: JsonCodec, url: str, body: bytes, raw: bool = False) -> bytes:
+    content = codec.loads(body)
+    if not raw:
+        return codec.dumps({"url": url, "content": content}) + b"\n"
+    if not body.isascii():
+        body.decode("utf-8")
+    body = body.removeprefix(codecs.BOM_UTF8).strip()
+    body = body.replace(b"\n", b" ").replace(b"\r", b" ")
+    return b'{"url":' + codec.dumps(url) + b',"content":' + body + b"}\n"
 
-    async def get_url(session: aiohttp.ClientSession, url: str) -> dict | None:
-        async with semaphore:
+
+async def read_limited(response: aiohttp.ClientResponse, max_size: int) -> bytes | None:
+    if response.content_length is not None and response.content_length > max_size:
+        return None
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_any():
+        size += len(chunk)
+        if size > max_size:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class ResultWriter:
+    def __init__(
+        self,
+        path: str,
+        compression: str | None = None,
+        fsync: str = "never",
+        batch_bytes: int = 1 << 20,
+        flush_interval: float = 1.0,
+        queue_size: int = 10000,
+    ):
+        if compression not in (None, *COMPRESSION_SUFFIXES):
+            raise ValueError(f"Неизвестное сжатие: {compression}")
+        if compression == "zstd" and zstandard is None:
+            raise RuntimeError("Для zstd нужен пакет zstandard")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Неизвестная политика fsync: {fsync}")
+        self.path = path
+        self.compression = compression
+        self.fsync = fsync
+        self.batch_bytes = batch_bytes
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.task = None
+        self.records_written = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    def check(self):
+        if self.task.done():
+            self.task.result()
+            raise RuntimeError("Запись результатов остановлена")
+
+    async def enqueue(self, item: bytes | None):
+        put = asyncio.ensure_future(self.queue.put(item))
+        try:
+            await asyncio.wait((put, self.task), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            put.cancel()
+
+    async def put(self, line: bytes):
+        self.check()
+        try:
+            self.queue.put_nowait(line)
+        except asyncio.QueueFull:
+            await self.enqueue(line)
+            self.check()
+
+    async def close(self):
+        if not self.task.done():
+            await self.enqueue(None)
+        await self.task
+
+    def open(self):
+        raw = open(self.path, "wb")
+        if self.compression == "gzip":
+            return raw, gzip.GzipFile(fileobj=raw, mode="wb")
+        if self.compression == "zstd":
+            return raw, zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        return raw, raw
+
+    def write_batch(self, raw, stream, data: bytes):
+        stream.write(data)
+        if self.fsync == "batch":
+            stream.flush()
+            if stream is not raw:
+                raw.flush()
+            os.fsync(raw.fileno())
+
+    def finish(self, raw, stream):
+        if stream is not raw:
+            stream.close()
+        if self.fsync != "never":
+            raw.flush()
+            os.fsync(raw.fileno())
+        raw.close()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        raw, stream = await asyncio.to_thread(self.open)
+        batch = []
+        batch_size = 0
+        deadline = 0.0
+        try:
+            while True:
+                try:
+                    if batch:
+                        line = await asyncio.wait_for(
+                            self.queue.get(), max(0.0, deadline - loop.time())
+                        )
+                    else:
+                        line = await self.queue.get()
+                        deadline = loop.time() + self.flush_interval
+                except asyncio.TimeoutError:
+                    line = b""
+
+                if line:
+                    batch.append(line)
+                    batch_size += len(line)
+                    self.records_written += 1
+                if batch and (
+                    line is None
+                    or batch_size >= self.batch_bytes
+                    or loop.time() >= deadline
+                ):
+                    await asyncio.to_thread(
+                        self.write_batch, raw, stream, b"".join(batch)
+                    )
+                    batch = []
+                    batch_size = 0
+                if line is None:
+                    break
+        finally:
             try:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.read()
-                        return {"url": url, "content": json.loads(data)}
-            except Exception as e:
-                print(f"Ошибка {url}: {e}")
+                if batch:
+                    await asyncio.to_thread(
+                        self.write_batch, raw, stream, b"".join(batch)
+                    )
+            finally:
+                await asyncio.to_thread(self.finish, raw, stream)
+
+
+def output_path(output_file: str, compression: str | None) -> str:
+    suffix = COMPRESSION_SUFFIXES.get(compression)
+    if suffix and not output_file.endswith(suffix):
+        output_file += suffix
+    return output_file
+
+
+def shard_output_file(output_file: str, shard: int) -> str:
+    base, ext = os.path.splitext(output_file)
+    return f"{base}-{shard:05d}{ext}"
+
+
+def host_shard(url: str, shards: int) -> int:
+    return zlib.crc32(urlsplit(url).netloc.encode()) % shards
+
+
+def byte_ranges(input_file: str, shards: int) -> list[tuple[int, int]]:
+    size = os.path.getsize(input_file)
+    bounds = [size * i // shards for i in range(shards + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def read_input_urls(f, byte_range=None, host_filter=None):
+    if byte_range is not None:
+        start, end = byte_range
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            url = line.strip().decode()
+            if url:
+                yield url
+        return
+
+    for line in f:
+        url = line.strip().decode()
+        if url and (host_filter is None or host_filter(url)):
+            yield url
+
+
+async def fetch_urls(
+    input_file: str,
+    worker_count: int = 100,
+    output_file: str = "result.jsonl",
+    compression: str | None = None,
+    fsync: str = "never",
+    codec: str | None = None,
+    max_body_size: int = MAX_BODY_SIZE,
+    raw: bool = False,
+    byte_range: tuple[int, int] | None = None,
+    host_filter=None,
+    progress=None,
+    progress_interval: float = 1.0,
+    metrics_interval: float | None = None,
+    metrics_file: str | None = None,
+) -> None:
+    json_codec = get_codec(codec)
+    output_file = output_path(output_file, compression)
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    stats = {"processed": 0, "written": 0, "bytes": 0}
+
+    url_queue = asyncio.Queue(maxsize=worker_count * 2)
+
+    scheduler = HostScheduler()
+
+    metrics = None
+    if metrics_interval:
+        metrics = FetchMetrics(queue_depth=url_queue.qsize)
+
+    async def get_url(session: aiohttp.ClientSession, url: str) -> bytes | None:
+        started = metrics.request_started() if metrics else 0.0
+        status = 0
+        try:
+            for _ in range(3):
+                try:
+                    async with scheduler.request(
+                        metrics.pick_session(session) if metrics else session, url
+                    ) as response:
+                        status = response.status
+                        if status == 200:
+                            data = await read_limited(response, max_body_size)
+                            if data is None:
+                                print(f"Ответ {url} больше {max_body_size} байт")
+                                return None
+                            return build_record(json_codec, url, data, raw)
+                        if status not in RETRY_STATUSES:
+                            return None
+                except Exception as e:
+                    print(f"Ошибка {url}: {e}")
+                    return None
             return None
+        finally:
+            if metrics:
+                metrics.request_finished(url, status, started)
 
     async def worker():
         while True:
             try:
                 url = await url_queue.get()
-                result = await get_url(session, url)
-                if result:
-                    async with output_lock:
-                        with open(output_file, "a", encoding="utf-8") as f:
-                            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+                line = await get_url(session, url)
+                if line:
+                    await writer.put(line)
+                    stats["written"] += 1
+                    stats["bytes"] += len(line)
+                stats["processed"] += 1
                 url_queue.task_done()
             except asyncio.CancelledError:
                 break
             except Exception as e:
+                if writer.task.done():
+                    raise
                 print(f"Ошибка в worker: {e}")
                 url_queue.task_done()
 
-    output_lock = asyncio.Lock()
+    async def report_progress():
+        while True:
+            await asyncio.sleep(progress_interval)
+            progress(dict(stats))
 
     try:
-        with open(input_file) as f:
-            for line in f:
-                url = line.strip()
-                if url:
-                    await url_queue.put(url)
-        print(f"URL-адреса загружены в очередь")
+        input_handle = open(input_file, "rb")
     except Exception as e:
         print(f"Ошибка чтения файла {input_file}: {e}")
         return
 
-    with open(output_file, "w", encoding="utf-8"):
-        pass
+    writer = ResultWriter(output_file, compression=compression, fsync=fsync)
+    writer.start()
 
-    async with aiohttp.ClientSession(
-        connector=aiohttp.TCPConnector(ssl=False, limit=100),
-        timeout=aiohttp.ClientTimeout(total=300),
-    ) as session:
-        worker_count = 20
+    async with (
+        aiohttp.ClientSession(
+            connector=create_connector(limit=100),
+            timeout=aiohttp.ClientTimeout(total=300),
+        ) as session,
+        metrics.tracing(session) if metrics else contextlib.nullcontext(),
+    ):
         workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
+        if progress is not None:
+            workers.append(asyncio.create_task(report_progress()))
+        if metrics is not None:
+            workers.append(
+                asyncio.create_task(metrics.report(metrics_interval, metrics_file))
+            )
 
-        await url_queue.join()
-
-        for w in workers:
-            w.cancel()
+        async def feed():
+            with input_handle as f:
+                for url in read_input_urls(f, byte_range, host_filter):
+                    await url_queue.put(url)
+            print("URL-адреса загружены в очередь")
+            await url_queue.join()
 
-        await asyncio.gather(*workers, return_exceptions=True)
+        feeder = asyncio.create_task(feed())
+        try:
+            await asyncio.wait(
+                (feeder, writer.task), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for task in (feeder, *workers):
+                task.cancel()
+            await asyncio.gather(feeder, *workers, return_exceptions=True)
+        if not feeder.cancelled() and feeder.exception() is not None:
+            await writer.close()
+            raise feeder.exception()
 
+    await writer.close()
+    if progress is not None:
+        progress(dict(stats))
+    if metrics is not None:
+        metrics.print_summary(metrics_file)
     print("Обработка завершена")
 
 
+def run_shard(
+    shard: int,
+    processes: int,
+    input_file: str,
+    output_file: str,
+    shard_by: str,
+    progress_queue,
+    options: dict,
+):
+    byte_range = None
+    host_filter = None
+    if shard_by == "bytes":
+        byte_range = byte_ranges(input_file, processes)[shard]
+    else:
+
+        def host_filter(url):
+            return host_shard(url, processes) == shard
+
+    if options.get("metrics_file"):
+        options = {
+            **options,
+            "metrics_file": shard_output_file(options["metrics_file"], shard),
+        }
+    asyncio.run(
+        fetch_urls(
+            input_file,
+            output_file=shard_output_file(output_file, shard),
+            byte_range=byte_range,
+            host_filter=host_filter,
+            progress=lambda stats: progress_queue.put((shard, stats)),
+            **options,
+        )
+    )
+
+
+def print_progress(shard_stats: dict, started: float):
+    processed = sum(stats["processed"] for stats in shard_stats.values())
+    written = sum(stats["written"] for stats in shard_stats.values())
+    megabytes = sum(stats["bytes"] for stats in shard_stats.values()) / 1024 / 1024
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(
+        f"Обработано {processed} URL, записано {written} "
+        f"({megabytes:.1f} МБ), {processed / elapsed:.0f} URL/с"
+    )
+
+
+def fetch_urls_multiprocess(
+    input_file: str,
+    processes: int,
+    output_file: str = "result.jsonl",
+    shard_by: str = "bytes",
+    merge: bool = False,
+    progress_interval: float = 1.0,
+    **options,
+) -> dict:
+    progress_queue = mp.Queue()
+    options["progress_interval"] = progress_interval
+    workers = [
+        mp.Process(
+            target=run_shard,
+            args=(
+                shard,
+                processes,
+                input_file,
+                output_file,
+                shard_by,
+                progress_queue,
+                options,
+            ),
+        )
+        for shard in range(processes)
+    ]
+    started = time.monotonic()
+    for p in workers:
+        p.start()
+
+    shard_stats = {}
+    last_report = started
+    while any(p.is_alive() for p in workers) or not progress_queue.empty():
+        try:
+            shard, stats = progress_queue.get(timeout=progress_interval)
+            shard_stats[shard] = stats
+        except queue.Empty:
+            pass
+        if time.monotonic() - last_report >= progress_interval:
+            print_progress(shard_stats, started)
+            last_report = time.monotonic()
+
+    for p in workers:
+        p.join()
+    print_progress(shard_stats, started)
+
+    shard_files = [
+        output_path(shard_output_file(output_file, shard), options.get("compression"))
+        for shard in range(processes)
+    ]
+    failed = {
+        shard: p.exitcode
+        for shard, p in enumerate(workers)
+        if p.exitcode != 0 or not os.path.exists(shard_files[shard])
+    }
+    if failed:
+        raise RuntimeError(
+            f"Шарды завершились с ошибкой (шард: код выхода) {failed}, "
+            "результаты не объединены"
+        )
+    if merge:
+        merged_file = output_path(output_file, options.get("compression"))
+        with open(merged_file, "wb") as merged:
+            for shard_file in shard_files:
+                with open(shard_file, "rb") as f:
+                    while chunk := f.read(1 << 20):
+                        merged.write(chunk)
+                os.remove(shard_file)
+        print(f"Результаты объединены в {merged_file}")
+
+    return shard_stats
+
+
 def main():
-    import sys
+    parser = argparse.ArgumentParser()
+    parser.add_argument("input_file")
+    parser.add_argument("--output", default="result.jsonl")
+    parser.add_argument("--workers", type=int, default=100)
+    parser.add_argument("--compression", choices=sorted(COMPRESSION_SUFFIXES))
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="never")
+    parser.add_argument("--codec", choices=CODECS)
+    parser.add_argument("--max-body-size", type=int, default=MAX_BODY_SIZE)
+    parser.add_argument("--raw", action="store_true")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--shard-by", choices=("bytes", "host"), default="bytes")
+    parser.add_argument("--merge", action="store_true")
+    parser.add_argument("--metrics-interval", type=float)
+    parser.add_argument("--metrics-file")
+    args = parser.parse_args()
 
-    if len(sys.argv) > 1:
-        asyncio.run(fetch_urls(sys.argv[1]))
+    options = {
+        "worker_count": args.workers,
+        "compression": args.compression,
+        "fsync": args.fsync,
+        "codec": args.codec,
+        "max_body_size": args.max_body_size,
+        "raw": args.raw,
+        "metrics_interval": args.metrics_interval,
+        "metrics_file": args.metrics_file,
+    }
+    if args.processes > 1:
+        fetch_urls_multiprocess(
+            args.input_file,
+            args.processes,
+            output_file=args.output,
+            shard_by=args.shard_by,
+            merge=args.merge,
+            **options,
+        )
+    else:
+        asyncio.run(fetch_urls(args.input_file, output_file=args.output, **options))
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1:
+        main()
+        sys.exit()
+
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "urls.txt")
+        Path(input_file).touch()
+        output_file = os.path.join(tmp_dir, "out", "result.jsonl")
+        fetch_urls_multiprocess(
+            input_file, 2, output_file=output_file, merge=True, progress_interval=0.1
+        )
+        assert os.path.exists(output_file)
+        assert not os.path.exists(shard_output_file(output_file, 0))
+
+        os.remove(output_file)
+        complete_shard = fetch_urls
+
+        async def fetch_urls(input_file, output_file, **options):
+            if output_file == shard_output_file(failing_output, 1):
+                raise RuntimeError("Сбой шарда")
+            await complete_shard(input_file, output_file=output_file, **options)
+
+        failing_output = output_file
+        try:
+            fetch_urls_multiprocess(
+                input_file,
+                2,
+                output_file=output_file,
+                merge=True,
+                progress_interval=0.1,
+            )
+        except RuntimeError as e:
+            assert "{1: 1}" in str(e)
+        else:
+            raise AssertionError
+        assert os.path.exists(shard_output_file(output_file, 0))
+        assert not os.path.exists(output_file)
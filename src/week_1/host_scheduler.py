@@ -0,0 +1,132 @@
+import asyncio
+import contextlib
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import aiohttp
+
+BACKOFF_STATUSES = {429, 502, 503, 504}
+RETRY_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: str | None) -> float:
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        decrease_factor: float = 0.5,
+        latency_tolerance: float = 2.0,
+        max_retry_after: float = 60.0,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.max_retry_after = max_retry_after
+        self.in_flight = 0
+        self.latency = None
+        self.best_latency = None
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        while True:
+            delay = self.blocked_until - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency: float, status: int | None):
+        async with self.condition:
+            self.in_flight -= 1
+            if status is None or status >= 500 or status == 429:
+                self.decrease()
+            else:
+                self.observe(latency)
+            self.condition.notify(max(1, int(self.limit) - self.in_flight))
+
+    def observe(self, latency: float):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = 0.8 * self.latency + 0.2 * latency
+        if self.best_latency is None or self.latency < self.best_latency:
+            self.best_latency = self.latency
+        if self.latency <= self.best_latency * self.latency_tolerance:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def decrease(self):
+        now = time.monotonic()
+        if now - self.last_decrease < (self.latency or 0.0):
+            return
+        self.last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+
+    def retry_after(self, seconds: float):
+        seconds = min(seconds, self.max_retry_after)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class HostScheduler:
+    def __init__(self, **limiter_options):
+        self.limiter_options = limiter_options
+        self.limiters = {}
+
+    def limiter(self, url: str) -> AdaptiveLimiter:
+        host = urlsplit(url).netloc
+        limiter = self.limiters.get(host)
+        if limiter is None:
+            limiter = AdaptiveLimiter(**self.limiter_options)
+            self.limiters[host] = limiter
+        return limiter
+
+    @contextlib.asynccontextmanager
+    async def request(self, session: aiohttp.ClientSession, url: str, **kwargs):
+        limiter = self.limiter(url)
+        await limiter.acquire()
+        status = None
+        start = time.monotonic()
+        try:
+            async with session.get(url, **kwargs) as response:
+                status = response.status
+                if status in BACKOFF_STATUSES:
+                    limiter.retry_after(
+                        parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                yield response
+        finally:
+            await limiter.release(time.monotonic() - start, status)
+
+    def stats(self) -> dict:
+        return {
+            host: {"limit": round(limiter.limit, 2), "latency": limiter.latency}
+            for host, limiter in self.limiters.items()
+        }
+
+
+def create_connector(limit: int = 100, limit_per_host: int = 64):
+    return aiohttp.TCPConnector(ssl=False, limit=limit, limit_per_host=limit_per_host)
@@ -0,0 +1,74 @@
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fetch_urls_updated import CODECS, build_record, get_codec
+
+
+def generate_corpus(
+    directory: Path, files: int = 5, records: int = 20000
+) -> list[Path]:
+    paths = []
+    for i in range(files):
+        payload = {
+            "items": [
+                {
+                    "id": j,
+                    "name": f"item-{j}",
+                    "price": round(random.uniform(1, 1000), 2),
+                    "tags": random.sample(["a", "b", "c", "d", "e", "f"], 3),
+                    "description": "описание " * random.randint(1, 5),
+                }
+                for j in range(records)
+            ]
+        }
+        path = directory / f"corpus_{i}.json"
+        path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def bench_codec(codec_name: str, bodies: list[bytes], raw: bool, repeat: int = 3):
+    codec = get_codec(codec_name)
+    total_mb = sum(len(body) for body in bodies) / 1024 / 1024
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        for i, body in enumerate(bodies):
+            build_record(codec, f"http://example.com/{i}", body, raw)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000 / total_mb
+
+
+def main(files: int = 5, records: int = 20000):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = generate_corpus(Path(directory), files, records)
+        bodies = [path.read_bytes() for path in paths]
+    total_mb = sum(len(body) for body in bodies) / 1024 / 1024
+    print(f"Корпус: {len(bodies)} файлов, {total_mb:.1f} МБ")
+
+    results = {}
+    for codec_name in CODECS:
+        try:
+            get_codec(codec_name)
+        except RuntimeError as e:
+            print(f"{codec_name:>8}: пропущен ({e})")
+            continue
+        for raw in (False, True):
+            results[codec_name, raw] = bench_codec(codec_name, bodies, raw)
+
+    baseline = results["json", False]
+    for (codec_name, raw), cpu_per_mb in results.items():
+        mode = "raw" if raw else "reencode"
+        print(
+            f"{codec_name:>8} {mode:>8}: {cpu_per_mb:7.2f} мс CPU/МБ "
+            f"(экономия {baseline - cpu_per_mb:6.2f} мс/МБ)"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -1,36 +1,808 @@
+import asyncio
+import builtins
+import concurrent.futures
+import functools
+import inspect
+import itertools
+import pickle
+import sys
+import threading
+import time
 import unittest.mock
-from collections import OrderedDict
+import weakref
+from collections import OrderedDict, namedtuple
 
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
 
-def lru_cache(*args, maxsize=None):
-    def create_wrapper(func, cache_obj, has_maxsize=False):
-        def wrapper(*args, **kwargs):
-            key = (args, frozenset(kwargs.items()))
-            if key in cache_obj:
-                if has_maxsize:
-                    cache_obj.move_to_end(key)
-                return cache_obj[key]
+MISSING = object()
+KWARGS_MARK = object()
+FAST_TYPES = {int, str}
 
+
+def make_key(args: tuple, kwargs: dict, typed: bool = False):
+    key = args
+    if kwargs:
+        key += (KWARGS_MARK,)
+        for item in kwargs.items():
+            key += item
+    if typed:
+        key += tuple(type(v) for v in args)
+        if kwargs:
+            key += tuple(type(v) for v in kwargs.values())
+    elif len(key) == 1 and type(key[0]) in FAST_TYPES:
+        return key[0]
+    return key
+
+
+def encode_key(key) -> bytes:
+    if type(key) is str:
+        return b"s" + key.encode("utf-8", "surrogatepass")
+    if type(key) is int:
+        return b"i" + str(key).encode()
+    return pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+
+
+def decode_key(key_bytes: bytes):
+    if key_bytes[:1] == b"s":
+        return key_bytes[1:].decode("utf-8", "surrogatepass")
+    if key_bytes[:1] == b"i":
+        return int(key_bytes[1:])
+    return pickle.loads(key_bytes)
+
+
+class Node:
+    __slots__ = ("prev", "next", "key", "value")
+
+    def __init__(self, key=None, value=None):
+        self.key = key
+        self.value = value
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.map = {}
+        self.root = Node()
+        self.root.prev = self.root.next = self.root
+
+    def get(self, key, default=MISSING):
+        node = self.map.get(key)
+        if node is None:
+            return default
+        root = self.root
+        next_ = node.next
+        if next_ is not root:
+            prev = node.prev
+            prev.next = next_
+            next_.prev = prev
+            last = root.prev
+            last.next = root.prev = node
+            node.prev = last
+            node.next = root
+        return node.value
+
+    def put(self, key, value):
+        root = self.root
+        node = self.map.get(key)
+        if node is not None:
+            node.value = value
+            self.get(key)
+            return
+        if len(self.map) >= self.maxsize:
+            if not self.maxsize:
+                return
+            oldest = root.next
+            root.next = oldest.next
+            oldest.next.prev = root
+            del self.map[oldest.key]
+            node = oldest
+            node.key = key
+            node.value = value
+        else:
+            node = Node(key, value)
+        last = root.prev
+        last.next = root.prev = node
+        node.prev = last
+        node.next = root
+        self.map[key] = node
+
+    def pop(self, key, default=None):
+        node = self.map.pop(key, None)
+        if node is None:
+            return default
+        node.prev.next = node.next
+        node.next.prev = node.prev
+        return node.value
+
+    def items(self) -> list:
+        return [(key, node.value) for key, node in self.map.items()]
+
+    def clear(self):
+        self.map.clear()
+        self.root.prev = self.root.next = self.root
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+
+class WeightedNode(Node):
+    __slots__ = ("weight",)
+
+
+class WeightedLRUCache(LRUCache):
+    def __init__(self, maxweight: int, sizeof=sys.getsizeof):
+        super().__init__(maxweight)
+        self.sizeof = sizeof
+        self.weight = 0
+
+    def put(self, key, value):
+        weight = self.sizeof(value)
+        if weight > self.maxsize:
+            self.pop(key)
+            return
+        node = self.map.get(key)
+        if node is not None:
+            self.weight += weight - node.weight
+            node.value = value
+            node.weight = weight
+            self.get(key)
+        else:
+            node = WeightedNode(key, value)
+            node.weight = weight
+            root = self.root
+            last = root.prev
+            last.next = root.prev = node
+            node.prev = last
+            node.next = root
+            self.map[key] = node
+            self.weight += weight
+        while self.weight > self.maxsize:
+            self.pop(self.root.next.key)
+
+    def pop(self, key, default=None):
+        node = self.map.get(key)
+        if node is None:
+            return default
+        self.weight -= node.weight
+        return super().pop(key)
+
+    def clear(self):
+        super().clear()
+        self.weight = 0
+
+
+class LFUEntry:
+    __slots__ = ("value", "weight", "freq")
+
+    def __init__(self, value, weight: int):
+        self.value = value
+        self.weight = weight
+        self.freq = 1
+
+
+class LFUCache:
+    def __init__(self, maxsize: int, sizeof=None):
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.weight = 0
+        self.map = {}
+        self.buckets = {}
+        self.min_freq = 1
+
+    def touch(self, key, entry: LFUEntry):
+        freq = entry.freq
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        entry.freq = freq + 1
+        bucket = self.buckets.get(freq + 1)
+        if bucket is None:
+            bucket = self.buckets[freq + 1] = OrderedDict()
+        bucket[key] = None
+
+    def get(self, key, default=MISSING):
+        entry = self.map.get(key)
+        if entry is None:
+            return default
+        self.touch(key, entry)
+        return entry.value
+
+    def put(self, key, value):
+        weight = self.sizeof(value) if self.sizeof else 1
+        if weight > self.maxsize:
+            self.pop(key)
+            return
+        entry = self.map.get(key)
+        if entry is not None:
+            self.weight += weight - entry.weight
+            entry.value = value
+            entry.weight = weight
+            self.touch(key, entry)
+        else:
+            while self.map and self.weight + weight > self.maxsize:
+                self.evict()
+            self.map[key] = LFUEntry(value, weight)
+            bucket = self.buckets.get(1)
+            if bucket is None:
+                bucket = self.buckets[1] = OrderedDict()
+            bucket[key] = None
+            self.min_freq = 1
+            self.weight += weight
+        while self.weight > self.maxsize:
+            self.evict()
+
+    def evict(self):
+        if self.min_freq not in self.buckets:
+            self.min_freq = min(self.buckets)
+        self.pop(next(iter(self.buckets[self.min_freq])))
+
+    def pop(self, key, default=None):
+        entry = self.map.pop(key, None)
+        if entry is None:
+            return default
+        freq = entry.freq
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+        self.weight -= entry.weight
+        return entry.value
+
+    def items(self) -> list:
+        return [(key, entry.value) for key, entry in self.map.items()]
+
+    def clear(self):
+        self.map.clear()
+        self.buckets.clear()
+        self.min_freq = 1
+        self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+
+class FrequencySketch:
+    SEEDS = (
+        0x9E3779B97F4A7C15,
+        0xC2B2AE3D27D4EB4F,
+        0x165667B19E3779F9,
+        0xD6E8FEB86659FD93,
+    )
+    MASK64 = (1 << 64) - 1
+    MAX_COUNT = 15
+    HALVE = bytes(count >> 1 for count in range(256))
+
+    def __init__(self, capacity: int):
+        bits = max(4, capacity.bit_length())
+        self.width = 1 << bits
+        self.shift = 64 - bits
+        self.table = bytearray(self.width * len(self.SEEDS))
+        self.sample_size = 10 * max(capacity, 1)
+        self.additions = 0
+
+    def indexes(self, key) -> tuple:
+        h = hash(key) & self.MASK64
+        mask = self.MASK64
+        shift = self.shift
+        width = self.width
+        s0, s1, s2, s3 = self.SEEDS
+        return (
+            ((h * s0) & mask) >> shift,
+            width + (((h * s1) & mask) >> shift),
+            2 * width + (((h * s2) & mask) >> shift),
+            3 * width + (((h * s3) & mask) >> shift),
+        )
+
+    def increment(self, key):
+        table = self.table
+        for index in self.indexes(key):
+            if table[index] < self.MAX_COUNT:
+                table[index] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = bytearray(table.translate(self.HALVE))
+            self.additions //= 2
+
+    def estimate(self, key) -> int:
+        table = self.table
+        a, b, c, d = self.indexes(key)
+        return min(table[a], table[b], table[c], table[d])
+
+
+class TinyLFUEntry:
+    __slots__ = ("value", "weight", "queue")
+
+    def __init__(self, value, weight: int, queue: OrderedDict):
+        self.value = value
+        self.weight = weight
+        self.queue = queue
+
+
+class TinyLFUCache:
+    TYPICAL_WEIGHT = 256
+    MAX_SKETCH_ENTRIES = 1 << 20
+
+    def __init__(
+        self,
+        maxsize: int,
+        sizeof=None,
+        window_ratio: float = 0.01,
+        protected_ratio: float = 0.8,
+        expected_entries: int | None = None,
+    ):
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.window_max = max(1, int(maxsize * window_ratio)) if maxsize else 0
+        self.protected_max = int((maxsize - self.window_max) * protected_ratio)
+        if expected_entries is None:
+            expected_entries = (
+                maxsize if sizeof is None else maxsize // self.TYPICAL_WEIGHT
+            )
+        self.sketch = FrequencySketch(min(expected_entries, self.MAX_SKETCH_ENTRIES))
+        self.map = {}
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        self.weight = 0
+        self.window_weight = 0
+        self.protected_weight = 0
+
+    def get(self, key, default=MISSING):
+        self.sketch.increment(key)
+        entry = self.map.get(key)
+        if entry is None:
+            return default
+        if entry.queue is self.probation:
+            del self.probation[key]
+            entry.queue = self.protected
+            self.protected[key] = entry
+            self.protected_weight += entry.weight
+            while (
+                self.protected_weight > self.protected_max and len(self.protected) > 1
+            ):
+                demoted_key, demoted = self.protected.popitem(last=False)
+                self.protected_weight -= demoted.weight
+                demoted.queue = self.probation
+                self.probation[demoted_key] = demoted
+        else:
+            entry.queue.move_to_end(key)
+        return entry.value
+
+    def put(self, key, value):
+        weight = self.sizeof(value) if self.sizeof else 1
+        if weight > self.maxsize:
+            self.pop(key)
+            return
+        entry = self.map.get(key)
+        if entry is not None:
+            delta = weight - entry.weight
+            entry.value = value
+            entry.weight = weight
+            self.weight += delta
+            if entry.queue is self.window:
+                self.window_weight += delta
+            elif entry.queue is self.protected:
+                self.protected_weight += delta
+            entry.queue.move_to_end(key)
+        else:
+            self.map[key] = self.window[key] = TinyLFUEntry(value, weight, self.window)
+            self.window_weight += weight
+            self.weight += weight
+        if self.window_weight > self.window_max or self.weight > self.maxsize:
+            self.evict()
+
+    def evict(self):
+        while self.window_weight > self.window_max and self.window:
+            key, entry = self.window.popitem(last=False)
+            self.window_weight -= entry.weight
+            entry.queue = self.probation
+            self.probation[key] = entry
+
+        while self.weight > self.maxsize:
+            if len(self.probation) > 1:
+                victim = next(iter(self.probation))
+                candidate = next(reversed(self.probation))
+                if self.sketch.estimate(candidate) > self.sketch.estimate(victim):
+                    self.pop(victim)
+                else:
+                    self.pop(candidate)
+            elif self.probation:
+                self.pop(next(iter(self.probation)))
+            elif self.protected:
+                self.pop(next(iter(self.protected)))
+            else:
+                self.pop(next(iter(self.window)))
+
+    def pop(self, key, default=None):
+        entry = self.map.pop(key, None)
+        if entry is None:
+            return default
+        del entry.queue[key]
+        self.weight -= entry.weight
+        if entry.queue is self.window:
+            self.window_weight -= entry.weight
+        elif entry.queue is self.protected:
+            self.protected_weight -= entry.weight
+        return entry.value
+
+    def items(self) -> list:
+        return [(key, entry.value) for key, entry in self.map.items()]
+
+    def clear(self):
+        self.map.clear()
+        self.window.clear()
+        self.probation.clear()
+        self.protected.clear()
+        self.weight = self.window_weight = self.protected_weight = 0
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+
+class UnboundedCache:
+    def __init__(self):
+        self.map = {}
+        self.get = self.map.get
+        self.put = self.map.__setitem__
+        self.pop = self.map.pop
+        self.clear = self.map.clear
+        self.maxsize = None
+
+    def items(self) -> list:
+        return list(self.map.items())
+
+    def __len__(self) -> int:
+        return len(self.map)
+
+
+class ExpiringCache:
+    def __init__(self, cache, ttl):
+        self.cache = cache
+        self.ttl = ttl
+        self.maxsize = cache.maxsize
+
+    def get(self, key, default=MISSING):
+        entry = self.cache.get(key, MISSING)
+        if entry is MISSING:
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self.cache.pop(key, None)
+            return default
+        return value
+
+    def put(self, key, value):
+        ttl = self.ttl(value) if callable(self.ttl) else self.ttl
+        self.cache.put(key, (value, time.monotonic() + ttl))
+
+    def pop(self, key, default=None):
+        entry = self.cache.pop(key, MISSING)
+        return default if entry is MISSING else entry[0]
+
+    def expire(self) -> int:
+        now = time.monotonic()
+        expired = [
+            key for key, (_, expires_at) in self.cache.items() if expires_at <= now
+        ]
+        for key in expired:
+            self.cache.pop(key, None)
+        return len(expired)
+
+    def items(self) -> list:
+        now = time.monotonic()
+        return [
+            (key, value)
+            for key, (value, expires_at) in self.cache.items()
+            if expires_at > now
+        ]
+
+    def clear(self):
+        self.cache.clear()
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+
+def lru_policy(maxsize: int, sizeof=None):
+    if sizeof is None:
+        return LRUCache(maxsize)
+    return WeightedLRUCache(maxsize, sizeof)
+
+
+POLICIES = {"lru": lru_policy, "lfu": LFUCache, "tinylfu": TinyLFUCache}
+
+
+def make_cache(maxsize: int | None, policy="lru", sizeof=None, ttl=None):
+    if maxsize is None:
+        cache = UnboundedCache()
+    else:
+        if sizeof is not None and ttl is not None:
+            value_sizeof = sizeof
+
+            def sizeof(entry):
+                return value_sizeof(entry[0])
+
+        factory = POLICIES[policy] if isinstance(policy, str) else policy
+        cache = factory(maxsize, sizeof)
+    if ttl is not None:
+        cache = ExpiringCache(cache, ttl)
+    return cache
+
+
+def start_sweeper(cache, interval: float) -> threading.Thread:
+    ref = weakref.ref(cache)
+
+    def sweep():
+        while True:
+            time.sleep(interval)
+            cache = ref()
+            if cache is None:
+                return
+            cache.expire()
+            del cache
+
+    thread = threading.Thread(target=sweep, name="lru-cache-sweeper", daemon=True)
+    thread.start()
+    return thread
+
+
+class StripedCache:
+    def __init__(self, maxsize: int | None, stripes: int = 16, make_segment=make_cache):
+        # Вытеснение идёт внутри сегмента: давность и частота учитываются по
+        # сегменту, а не по всему кэшу, зато сумма размеров сегментов равна maxsize.
+        self.maxsize = maxsize
+        if maxsize is None:
+            sizes = [None] * stripes
+        else:
+            stripes = max(1, min(stripes, maxsize))
+            base, extra = divmod(maxsize, stripes)
+            sizes = [base + (i < extra) for i in range(stripes)]
+        self.segments = [make_segment(size) for size in sizes]
+        self.locks = [threading.Lock() for _ in range(stripes)]
+        self.in_flight = [{} for _ in range(stripes)]
+        self.hits = [0] * stripes
+        self.misses = [0] * stripes
+
+    def clear(self):
+        for i, segment in enumerate(self.segments):
+            with self.locks[i]:
+                segment.clear()
+                self.hits[i] = self.misses[i] = 0
+
+    def get(self, key, default=MISSING):
+        i = hash(key) % len(self.segments)
+        with self.locks[i]:
+            return self.segments[i].get(key, default)
+
+    def put(self, key, value):
+        i = hash(key) % len(self.segments)
+        with self.locks[i]:
+            self.segments[i].put(key, value)
+
+    def expire(self) -> int:
+        expired = 0
+        for i, segment in enumerate(self.segments):
+            with self.locks[i]:
+                expired += segment.expire()
+        return expired
+
+    def __len__(self) -> int:
+        return builtins.sum(len(segment) for segment in self.segments)
+
+
+def create_striped_wrapper(
+    func, cache: StripedCache, typed: bool = False, single_flight: bool = False
+):
+    segments = cache.segments
+    locks = cache.locks
+    in_flight = cache.in_flight
+    hits = cache.hits
+    misses = cache.misses
+    stripes = len(segments)
+
+    def wrapper(*args, **kwargs):
+        key = make_key(args, kwargs, typed)
+        i = hash(key) % stripes
+        lock = locks[i]
+        leader = True
+        with lock:
+            result = segments[i].get(key, MISSING)
+            if result is not MISSING:
+                hits[i] += 1
+                return result
+            if single_flight:
+                call = in_flight[i].get(key)
+                if call is None:
+                    call = in_flight[i][key] = concurrent.futures.Future()
+                    misses[i] += 1
+                else:
+                    hits[i] += 1
+                    leader = False
+            else:
+                misses[i] += 1
+
+        if not leader:
+            return call.result()
+
+        try:
             result = func(*args, **kwargs)
-            cache_obj[key] = result
+        except BaseException as e:
+            if single_flight:
+                with lock:
+                    del in_flight[i][key]
+                call.set_exception(e)
+            raise
+
+        with lock:
+            segments[i].put(key, result)
+            if single_flight:
+                del in_flight[i][key]
+        if single_flight:
+            call.set_result(result)
+        return result
+
+    def cache_info() -> CacheInfo:
+        return CacheInfo(
+            builtins.sum(hits), builtins.sum(misses), cache.maxsize, len(cache)
+        )
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache.clear
+    return functools.update_wrapper(wrapper, func)
+
+
+def create_wrapper(func, cache, typed: bool = False):
+    hits = misses = 0
+    cache_get = cache.get
+    cache_put = cache.put
+
+    def wrapper(*args, **kwargs):
+        nonlocal hits, misses
+        if kwargs or typed:
+            key = make_key(args, kwargs, typed)
+        elif len(args) == 1 and type(args[0]) in FAST_TYPES:
+            key = args[0]
+        else:
+            key = args
+
+        result = cache_get(key, MISSING)
+        if result is not MISSING:
+            hits += 1
+            return result
+
+        misses += 1
+        result = func(*args, **kwargs)
+        cache_put(key, result)
+        return result
+
+    def cache_info() -> CacheInfo:
+        return CacheInfo(hits, misses, cache.maxsize, len(cache))
+
+    def cache_clear():
+        nonlocal hits, misses
+        cache.clear()
+        hits = misses = 0
+
+    def cache_map(*iterables) -> list:
+        nonlocal hits, misses
+        calls = list(zip(*iterables))
+        keys = [make_key(args, {}, typed) for args in calls]
+        found = cache.get_many(keys)
+        computed = {}
+        results = []
+        for key, args in zip(keys, calls):
+            if key in found:
+                result = found[key]
+                hits += 1
+            elif key in computed:
+                result = computed[key]
+                hits += 1
+            else:
+                result = computed[key] = func(*args)
+                misses += 1
+            results.append(result)
+        if computed:
+            cache.put_many(computed)
+        return results
 
-            if has_maxsize and len(cache_obj) > maxsize:
-                cache_obj.popitem(last=False)
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    if hasattr(cache, "get_many"):
+        wrapper.map = cache_map
+    return functools.update_wrapper(wrapper, func)
 
+
+def create_async_wrapper(func, cache, typed: bool = False):
+    hits = misses = 0
+    in_flight = {}
+
+    def store(key, task):
+        if in_flight.get(key) is task:
+            del in_flight[key]
+        if not task.cancelled() and task.exception() is None:
+            cache.put(key, task.result())
+
+    async def wrapper(*args, **kwargs):
+        nonlocal hits, misses
+        key = make_key(args, kwargs, typed)
+        result = cache.get(key, MISSING)
+        if result is not MISSING:
+            hits += 1
             return result
 
-        return wrapper
+        task = in_flight.get(key)
+        if task is None:
+            misses += 1
+            task = in_flight[key] = asyncio.ensure_future(func(*args, **kwargs))
+            task.add_done_callback(functools.partial(store, key))
+        else:
+            hits += 1
+        return await asyncio.shield(task)
+
+    def cache_info() -> CacheInfo:
+        return CacheInfo(hits, misses, cache.maxsize, len(cache))
 
-    if not maxsize:
-        if args:
-            func = args[0]
-            cache = {}
-            return create_wrapper(func, cache)
+    def cache_clear():
+        nonlocal hits, misses
+        cache.clear()
+        hits = misses = 0
+
+    wrapper.cache_info = cache_info
+    wrapper.cache_clear = cache_clear
+    return functools.update_wrapper(wrapper, func)
+
+
+def lru_cache(
+    *args,
+    maxsize=None,
+    typed=False,
+    lock=False,
+    single_flight=False,
+    stripes=16,
+    ttl=None,
+    maxweight=None,
+    sizeof=None,
+    policy="lru",
+    sweep_interval=None,
+    backend=None,
+):
+    if maxweight is not None:
+        if maxsize is not None:
+            raise ValueError("maxsize and maxweight are mutually exclusive")
+        maxsize = maxweight
+        sizeof = sizeof or sys.getsizeof
+    elif sizeof is not None:
+        raise ValueError("sizeof requires maxweight")
+    if sweep_interval is not None and ttl is None:
+        raise ValueError("sweep_interval requires ttl")
+    if backend is not None and ttl is not None:
+        raise ValueError(
+            "backend and ttl are mutually exclusive, set ttl on the backend"
+        )
+    if maxweight is not None:
+        stripes = 1
+    make_segment = functools.partial(make_cache, policy=policy, sizeof=sizeof, ttl=ttl)
 
     def decorator(func):
-        cache = OrderedDict()
-        return create_wrapper(func, cache, has_maxsize=True)
+        if backend is not None:
+            cache = backend
+        elif lock or single_flight or sweep_interval is not None:
+            cache = StripedCache(maxsize, stripes, make_segment)
+            if sweep_interval is not None:
+                start_sweeper(cache, sweep_interval)
+        else:
+            cache = make_segment(maxsize)
+        if inspect.iscoroutinefunction(func):
+            return create_async_wrapper(func, cache, typed)
+        if isinstance(cache, StripedCache):
+            return create_striped_wrapper(func, cache, typed, single_flight)
+        return create_wrapper(func, cache, typed)
 
+    if args and callable(args[0]):
+        return decorator(args[0])
     return decorator
 
 
@@ -70,3 +842,192 @@ if __name__ == "__main__":
     assert decorated(5, 6) == 3
     assert decorated(1, 2) == 4
     assert mocked_func.call_count == 4
+    assert decorated.cache_info() == (3, 4, 2, 2)
+
+    decorated.cache_clear()
+    assert decorated.cache_info() == (0, 0, 2, 0)
+
+    mocked_func = unittest.mock.Mock(side_effect=lambda a, b: a + b)
+    typed = lru_cache(typed=True)(mocked_func)
+    assert typed(1, 2) == 3
+    assert typed(1.0, 2) == 3.0
+    assert mocked_func.call_count == 2
+
+    mocked_func = unittest.mock.Mock(side_effect=lambda a, b: a + b)
+    untyped = lru_cache()(mocked_func)
+    assert untyped(1, 2) == 3
+    assert untyped(1.0, 2) == 3
+    assert mocked_func.call_count == 1
+
+    calls = itertools.count()
+
+    def slow_square(x: int) -> int:
+        next(calls)
+        time.sleep(0.05)
+        return x * x
+
+    single = lru_cache(single_flight=True)(slow_square)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=64) as executor:
+        results = list(executor.map(single, [i % 8 for i in range(2000)]))
+    assert results == [(i % 8) ** 2 for i in range(2000)]
+    assert next(calls) == 8
+    assert single.cache_info() == (1992, 8, None, 8)
+
+    calls = itertools.count()
+
+    def counted_identity(x):
+        next(calls)
+        return x
+
+    locked = lru_cache(maxsize=64, lock=True)(counted_identity)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=32) as executor:
+        results = list(executor.map(locked, [i % 100 for i in range(100_000)]))
+    assert results == [i % 100 for i in range(100_000)]
+    info = locked.cache_info()
+    assert info.hits + info.misses == 100_000
+    assert info.misses == next(calls)
+    assert info.currsize <= 64
+
+    for maxsize in range(1, 20):
+        small = lru_cache(maxsize=maxsize, lock=True)(lambda x: x)
+        for i in range(100):
+            small(i)
+        assert small.cache_info().currsize == maxsize
+        striped = StripedCache(maxsize)
+        assert builtins.sum(s.maxsize for s in striped.segments) == maxsize
+
+    def fail_once(x):
+        if mocked_func.call_count == 1:
+            raise ValueError
+        return x
+
+    mocked_func = unittest.mock.Mock(side_effect=fail_once)
+    flaky = lru_cache(single_flight=True)(mocked_func)
+    try:
+        flaky(1)
+    except ValueError:
+        pass
+    assert flaky(1) == 1
+    assert mocked_func.call_count == 2
+
+    async_calls = itertools.count()
+
+    @lru_cache(maxsize=8, ttl=0.2)
+    async def slow_double(x: int) -> int:
+        next(async_calls)
+        await asyncio.sleep(0.05)
+        return x * 2
+
+    async def check_async():
+        results = await asyncio.gather(*[slow_double(i % 4) for i in range(400)])
+        assert results == [(i % 4) * 2 for i in range(400)]
+        assert next(async_calls) == 4
+        assert slow_double.cache_info() == (396, 4, 8, 4)
+        assert await slow_double(1) == 2
+        await asyncio.sleep(0.25)
+        assert await slow_double(1) == 2
+        assert slow_double.cache_info().misses == 5
+
+        waiter = asyncio.ensure_future(slow_double(100))
+        other = asyncio.ensure_future(slow_double(100))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        assert await other == 200
+
+        failures = itertools.count()
+
+        @lru_cache
+        async def fail_once_async(x):
+            if next(failures) == 0:
+                raise ValueError
+            return x
+
+        try:
+            await fail_once_async(1)
+        except ValueError:
+            pass
+        assert await fail_once_async(1) == 1
+        assert await fail_once_async(1) == 1
+        assert fail_once_async.cache_info() == (1, 2, None, 1)
+
+    asyncio.run(check_async())
+
+    for name in POLICIES:
+        cache = make_cache(3, name)
+        for key in "abc":
+            cache.put(key, key)
+        for _ in range(3):
+            cache.get("a")
+            cache.get("b")
+        cache.put("d", "d")
+        assert len(cache) == 3
+        assert cache.get("a") == "a"
+
+    lfu = LFUCache(2)
+    lfu.put("a", 1)
+    lfu.get("a")
+    lfu.put("b", 2)
+    lfu.put("c", 3)
+    assert lfu.get("b", None) is None
+    assert lfu.get("a") == 1
+
+    tiny = TinyLFUCache(100)
+    trace = list(range(50)) * 5 + list(range(1000, 5000))
+    for key in trace:
+        if tiny.get(key, None) is None:
+            tiny.put(key, key)
+    assert builtins.sum(tiny.get(key, None) is not None for key in range(50)) >= 40
+
+    weighted = lru_cache(maxweight=10, sizeof=len)(lambda n: "x" * n)
+    weighted(4)
+    weighted(4)
+    weighted(5)
+    weighted(3)
+    assert weighted.cache_info() == (1, 3, 10, 2)
+    weighted(20)
+    assert weighted.cache_info().currsize == 2
+
+    weighted = lru_cache(maxweight=100, sizeof=len, lock=True)(lambda n: "x" * n)
+    weighted(50)
+    weighted(50)
+    weighted(40)
+    assert weighted.cache_info() == (1, 2, 100, 2)
+
+    tiny = make_cache(64 * 1024 * 1024, "tinylfu", sizeof=len)
+    assert len(tiny.sketch.table) <= 4 * 2 * TinyLFUCache.MAX_SKETCH_ENTRIES
+    assert TinyLFUCache(1000, len, expected_entries=10).sketch.width == 16
+
+    for name in POLICIES:
+        weighted = make_cache(10, name, sizeof=len)
+        for n in range(1, 8):
+            weighted.put(n, "x" * n)
+            assert weighted.weight <= 10
+
+    calls = itertools.count()
+
+    @lru_cache(ttl=0.1)
+    def stamped(x):
+        next(calls)
+        return x
+
+    stamped(1)
+    stamped(1)
+    time.sleep(0.15)
+    stamped(1)
+    assert next(calls) == 2
+
+    @lru_cache(maxsize=100, ttl=lambda value: value, sweep_interval=0.05)
+    def short_lived(ttl):
+        return ttl
+
+    try:
+        lru_cache(backend=UnboundedCache(), ttl=1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError
+
+    short_lived(0.01)
+    short_lived(60)
+    time.sleep(0.2)
+    assert short_lived.cache_info().currsize == 1
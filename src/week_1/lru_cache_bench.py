@@ -0,0 +1,158 @@
+import functools
+import itertools
+import random
+import sys
+import time
+import timeit
+from collections import OrderedDict
+
+from lru_cache import MISSING, POLICIES, lru_cache, make_cache
+
+
+def legacy_lru_cache(maxsize):
+    def decorator(func):
+        cache = OrderedDict()
+
+        def wrapper(*args, **kwargs):
+            key = (args, frozenset(kwargs.items()))
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+            result = func(*args, **kwargs)
+            cache[key] = result
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+IMPLEMENTATIONS = {
+    "legacy OrderedDict": legacy_lru_cache,
+    "lru_cache": lambda maxsize: lru_cache(maxsize=maxsize),
+    "functools.lru_cache": lambda maxsize: functools.lru_cache(maxsize=maxsize),
+}
+
+
+def identity(*args, **kwargs):
+    return args
+
+
+SCENARIOS = {
+    "hit f(1)": (lambda f: f(1), 128),
+    "hit f(1, 2)": (lambda f: f(1, 2), 128),
+    "hit f(1, b=2)": (lambda f: f(1, b=2), 128),
+}
+
+
+def bench_hits(number: int = 500_000):
+    for scenario, (call, maxsize) in SCENARIOS.items():
+        print(f"\n--- {scenario} ---")
+        for name, make in IMPLEMENTATIONS.items():
+            cached = make(maxsize)(identity)
+            call(cached)
+            elapsed = timeit.timeit(lambda: call(cached), number=number)
+            print(f"{name:>20}: {elapsed / number * 1e9:7.1f} нс/вызов")
+
+
+def bench_misses(number: int = 200_000, maxsize: int = 1024):
+    print(f"\n--- miss + eviction, maxsize={maxsize} ---")
+    for name, make in IMPLEMENTATIONS.items():
+        cached = make(maxsize)(identity)
+        keys = iter(range(10**9))
+        elapsed = timeit.timeit(lambda: cached(next(keys)), number=number)
+        print(f"{name:>20}: {elapsed / number * 1e9:7.1f} нс/вызов")
+
+
+def zipf_trace(keys: int, length: int, alpha: float = 0.9, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    cum_weights = list(
+        itertools.accumulate(1 / rank**alpha for rank in range(1, keys + 1))
+    )
+    return rng.choices(range(keys), cum_weights=cum_weights, k=length)
+
+
+def scan_trace(keys: int, length: int, scan_every: int = 20_000, scan_size: int = 5000):
+    trace = []
+    hot = zipf_trace(keys, length)
+    scan_key = keys
+    for i in range(0, length, scan_every):
+        trace.extend(hot[i : i + scan_every])
+        trace.extend(range(scan_key, scan_key + scan_size))
+        scan_key += scan_size
+    return trace
+
+
+def loop_trace(keys: int, length: int) -> list:
+    return [i % keys for i in range(length)]
+
+
+def read_trace(path: str) -> list:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def replay(cache, trace: list) -> tuple[float, float]:
+    get = cache.get
+    put = cache.put
+    misses = 0
+    start = time.perf_counter()
+    for key in trace:
+        if get(key, MISSING) is MISSING:
+            misses += 1
+            put(key, key)
+    elapsed = time.perf_counter() - start
+    return 1 - misses / len(trace), len(trace) / elapsed
+
+
+def bench_policies(trace_path: str | None = None, capacity: int = 1000):
+    if trace_path:
+        traces = {trace_path: read_trace(trace_path)}
+    else:
+        traces = {
+            "zipf 0.9": zipf_trace(50_000, 300_000),
+            "zipf + scans": scan_trace(50_000, 300_000),
+            "loop 1.5x": loop_trace(capacity * 3 // 2, 300_000),
+        }
+    for name, trace in traces.items():
+        print(f"\n--- trace {name}, {len(trace)} запросов, capacity={capacity} ---")
+        for policy in POLICIES:
+            hit_ratio, ops = replay(make_cache(capacity, policy), trace)
+            print(f"{policy:>8}: hit ratio {hit_ratio:6.2%}, {ops / 1e6:5.2f}M ops/s")
+
+
+def bench_weighted(maxweight: int = 1_000_000):
+    trace = zipf_trace(50_000, 300_000)
+    rng = random.Random(2)
+    sizes = [int(rng.paretovariate(1.2) * 200) for _ in range(50_000)]
+    print(f"\n--- weighted zipf 0.9, maxweight={maxweight} ---")
+    for policy in POLICIES:
+        cache = make_cache(maxweight, policy, sizeof=len)
+        get = cache.get
+        put = cache.put
+        hit_bytes = total_bytes = 0
+        start = time.perf_counter()
+        for key in trace:
+            size = sizes[key]
+            total_bytes += size
+            if get(key, MISSING) is MISSING:
+                put(key, b"x" * size)
+            else:
+                hit_bytes += size
+        elapsed = time.perf_counter() - start
+        print(
+            f"{policy:>8}: byte hit ratio {hit_bytes / total_bytes:6.2%}, "
+            f"{len(trace) / elapsed / 1e6:5.2f}M ops/s"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        bench_policies(sys.argv[1])
+    else:
+        bench_hits()
+        bench_misses()
+        bench_policies()
+        bench_weighted()
@@ -1,18 +1,41 @@
+import collections
 import concurrent.futures
+import functools
+import hashlib
+import math
 import os
+import pickle
 import random
+import sys
 import time
+from array import array
 from datetime import datetime
+from multiprocessing import resource_tracker, shared_memory
 
 import matplotlib.pyplot as plt
 import multiprocessing as mp
+import numpy as np
+
+import benchmark
+from factorial import CHECKPOINT_LIMIT, factorial, factorial_many, factorial_naive
+
+CHUNK_TARGET_SECONDS = 0.05
+RESULT_MODES = ("full", "bit_length", "digest")
+FIXED_WIDTH_MODES = ("bit_length", "digest")
+SKEWS = ("uniform", "zipf", "bimodal")
+KARATSUBA_EXPONENT = 1.585
+COST_SCALE = 3e-5
+BATCHES_PER_WORKER = 64
+
+pools = {}
 
 
 def time_check(func):
+    @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
+        start_time = time.perf_counter()
         result = func(*args, **kwargs)
-        end_time = time.time()
+        end_time = time.perf_counter()
         execution_time = end_time - start_time
         return result, execution_time
 
@@ -23,63 +46,151 @@ def generate_data(size: int) -> list[int]:
     return [random.randint(0, 1000) for _ in range(size)]
 
 
+def generate_skewed_data(
+    size: int,
+    skew: str = "zipf",
+    high: int = 10000,
+    alpha: float = 1.3,
+    heavy_fraction: float = 0.005,
+    seed: int | None = None,
+) -> list[int]:
+    rng = np.random.default_rng(seed)
+    if skew == "zipf":
+        values = np.minimum(rng.zipf(alpha, size) - 1, high)
+    elif skew == "bimodal":
+        heavy = rng.random(size) < heavy_fraction
+        values = np.where(heavy, high, rng.integers(0, 100, size))
+    elif skew == "uniform":
+        values = rng.integers(0, high + 1, size)
+    else:
+        raise ValueError(
+            f"Неизвестное распределение {skew!r}, ожидается одно из {SKEWS}"
+        )
+    return values.tolist()
+
+
+def estimate_cost(numbers) -> np.ndarray:
+    numbers = np.maximum(np.asarray(numbers, dtype=np.float64), 2)
+    large = COST_SCALE * (numbers * np.log2(numbers)) ** KARATSUBA_EXPONENT
+    return 1 + np.where(numbers > CHECKPOINT_LIMIT, large, numbers / 250)
+
+
 def process_number(num: int) -> int:
-    result = 1
-    for i in range(1, num + 1):
-        result *= i
+    return factorial(num)
+
+
+def process_indexed(idx: int, num: int) -> tuple[int, int]:
+    return idx, process_number(num)
+
+
+def apply_chunk(func, chunk: list) -> list:
+    return [func(item) for item in chunk]
 
+
+def ipc_task(func, payload: bytes) -> tuple[bytes, float, float]:
+    start = time.perf_counter()
+    args = pickle.loads(payload)
+    load_time = time.perf_counter() - start
+    result = func(*args)
+    start = time.perf_counter()
+    reply = pickle.dumps(result)
+    return reply, load_time, time.perf_counter() - start
+
+
+def ipc_payload(ipc: dict, args: tuple) -> bytes:
+    start = time.perf_counter()
+    payload = pickle.dumps(args)
+    ipc["sent"] += len(payload)
+    ipc["sent_time"] += time.perf_counter() - start
+    return payload
+
+
+def ipc_result(ipc: dict, reply: tuple[bytes, float, float]):
+    pickled, load_time, dump_time = reply
+    start = time.perf_counter()
+    result = pickle.loads(pickled)
+    ipc["received"] += len(pickled)
+    ipc["sent_time"] += load_time
+    ipc["received_time"] += dump_time + time.perf_counter() - start
     return result
 
 
-def worker(in_queue, out_queue):
+def worker(in_queue, out_queue, measure: bool = False):
     while True:
         try:
-            idx, num = in_queue.get(timeout=1)
-            if num == -1:
+            item = in_queue.get(timeout=1)
+            if item is None:
                 break
-            result = process_number(num)
-            out_queue.put((idx, result))
+            if measure:
+                out_queue.put(ipc_task(process_indexed, item))
+            else:
+                out_queue.put(process_indexed(*item))
         except mp.queues.Empty:
             break
 
 
+def pool_map(pool, func, data: list[int], ipc: dict | None = None) -> list:
+    chunk_size = max(1, math.ceil(len(data) / (mp.cpu_count() * 4)))
+    if ipc is None:
+        return pool.map(func, data, chunk_size)
+    task = functools.partial(ipc_task, functools.partial(apply_chunk, func))
+    payloads = [
+        ipc_payload(ipc, (data[start : start + chunk_size],))
+        for start in range(0, len(data), chunk_size)
+    ]
+    return [
+        result
+        for reply in pool.map(task, payloads, 1)
+        for result in ipc_result(ipc, reply)
+    ]
+
+
 @time_check
-def variant_a_thread_pool(data: list[int]) -> list[int]:
+def variant_a_thread_pool(data: list[int], executor=None) -> list[int]:
+    if executor is not None:
+        return list(executor.map(process_number, data))
     with concurrent.futures.ThreadPoolExecutor() as executor:
         result = list(executor.map(process_number, data))
     return result
 
 
 @time_check
-def variant_b_process_pool(data: list[int]) -> list[int]:
+def variant_b_process_pool(
+    data: list[int], pool=None, func=process_number, ipc: dict | None = None
+) -> list[int]:
+    if pool is not None:
+        return pool_map(pool, func, data, ipc)
     num_processes = mp.cpu_count()
     with mp.Pool(num_processes) as pool:
-        result = list(pool.map(process_number, data))
+        result = pool_map(pool, func, data, ipc)
     return result
 
 
 @time_check
-def variant_c_process_queue(data: list[int]) -> list[int]:
-    num_processes = mp.cpu_count()
+def variant_c_process_queue(
+    data: list[int], processes: int | None = None, ipc: dict | None = None
+) -> list[int]:
+    num_processes = processes or mp.cpu_count()
 
     input_queue = mp.Queue()
     output_queue = mp.Queue()
 
     processes = []
     for _ in range(num_processes):
-        p = mp.Process(target=worker, args=(input_queue, output_queue))
+        p = mp.Process(target=worker, args=(input_queue, output_queue, ipc is not None))
         p.start()
         processes.append(p)
 
     for i, num in enumerate(data):
-        input_queue.put((i, num))
+        input_queue.put((i, num) if ipc is None else ipc_payload(ipc, (i, num)))
 
     for _ in range(num_processes):
-        input_queue.put((-1, -1))
+        input_queue.put(None)
 
     results = [None] * len(data)
     for _ in range(len(data)):
-        index, result = output_queue.get()
+        reply = output_queue.get()
+        index, result = reply if ipc is None else ipc_result(ipc, reply)
         results[index] = result
 
     for p in processes:
@@ -88,36 +199,441 @@ def variant_c_process_queue(data: list[int]) -> list[int]:
     return results
 
 
+def get_pool(processes: int | None = None):
+    processes = processes or mp.cpu_count()
+    pool = pools.get(processes)
+    if pool is None:
+        resource_tracker.ensure_running()
+        pool = pools[processes] = mp.Pool(processes)
+    return pool
+
+
+def get_thread_pool():
+    executor = pools.get("threads")
+    if executor is None:
+        executor = pools["threads"] = concurrent.futures.ThreadPoolExecutor()
+    return executor
+
+
+def close_pools():
+    for pool in pools.values():
+        if isinstance(pool, concurrent.futures.Executor):
+            pool.shutdown()
+        else:
+            pool.close()
+            pool.join()
+    pools.clear()
+
+
+def encode_results(results: list[int], mode: str = "full") -> bytes:
+    if mode == "bit_length":
+        return array("Q", [result.bit_length() for result in results]).tobytes()
+    parts = []
+    for result in results:
+        raw = result.to_bytes((result.bit_length() + 7) // 8 or 1, "little")
+        if mode == "digest":
+            parts.append(hashlib.blake2b(raw, digest_size=8).digest())
+        else:
+            parts.append(len(raw).to_bytes(4, "little"))
+            parts.append(raw)
+    return b"".join(parts)
+
+
+def decode_results(buffer: bytes, mode: str = "full") -> list:
+    if mode == "bit_length":
+        return array("Q", buffer).tolist()
+    if mode == "digest":
+        return [buffer[i : i + 8] for i in range(0, len(buffer), 8)]
+    results = []
+    position = 0
+    while position < len(buffer):
+        size = int.from_bytes(buffer[position : position + 4], "little")
+        position += 4
+        results.append(int.from_bytes(buffer[position : position + size], "little"))
+        position += size
+    return results
+
+
+def process_chunk(numbers: list[int], mode: str = "full") -> tuple[bytes, float]:
+    start = time.perf_counter()
+    buffer = encode_results(factorial_many(numbers), mode)
+    return buffer, time.perf_counter() - start
+
+
 @time_check
-def sequential_processing(data: list[int]) -> list[int]:
-    return [process_number(num) for num in data]
+def variant_d_chunked_pool(
+    data: list[int], mode: str = "full", pool=None, ipc: dict | None = None
+) -> list:
+    processes = mp.cpu_count()
+    pool = pool or get_pool(processes)
+    results = [None] * len(data)
+    chunk_size = max(1, len(data) // (processes * 16))
+    pending = collections.deque()
+    position = 0
+
+    while position < len(data) or pending:
+        while position < len(data) and len(pending) < 2 * processes:
+            chunk = data[position : position + chunk_size]
+            if ipc is None:
+                async_result = pool.apply_async(process_chunk, (chunk, mode))
+            else:
+                payload = ipc_payload(ipc, (chunk, mode))
+                async_result = pool.apply_async(ipc_task, (process_chunk, payload))
+            pending.append((position, len(chunk), async_result))
+            position += len(chunk)
+
+        start, count, async_result = pending.popleft()
+        reply = async_result.get()
+        buffer, elapsed = reply if ipc is None else ipc_result(ipc, reply)
+        results[start : start + count] = decode_results(buffer, mode)
+
+        remaining = len(data) - position
+        if elapsed > 0 and remaining:
+            adaptive = int(CHUNK_TARGET_SECONDS * count / elapsed)
+            chunk_size = max(1, min(adaptive, math.ceil(remaining / processes)))
+
+    return results
+
+
+def factorial_bit_length(num: int) -> int:
+    return factorial(num).bit_length()
+
+
+def process_shared_range(
+    input_name: str, output_name: str, start: int, stop: int, mode: str = "bit_length"
+):
+    input_memory = shared_memory.SharedMemory(name=input_name)
+    output_memory = shared_memory.SharedMemory(name=output_name)
+    try:
+        numbers = np.ndarray(
+            stop - start, dtype=np.int64, buffer=input_memory.buf, offset=start * 8
+        )
+        output = np.ndarray(
+            stop - start, dtype=np.uint64, buffer=output_memory.buf, offset=start * 8
+        )
+        buffer = encode_results(factorial_many(numbers.tolist()), mode)
+        output[:] = np.frombuffer(buffer, dtype=np.uint64)
+        del numbers, output
+    finally:
+        input_memory.close()
+        output_memory.close()
+
+
+@time_check
+def variant_e_shared_memory(
+    data, mode: str = "bit_length", pool=None, ipc: dict | None = None
+) -> np.ndarray:
+    if mode not in FIXED_WIDTH_MODES:
+        raise ValueError(f"Режим {mode!r} не имеет фиксированной ширины результата")
+    processes = mp.cpu_count()
+    pool = pool or get_pool(processes)
+    size = len(data)
+    input_memory = shared_memory.SharedMemory(create=True, size=max(size, 1) * 8)
+    output_memory = shared_memory.SharedMemory(create=True, size=max(size, 1) * 8)
+    try:
+        numbers = np.ndarray(size, dtype=np.int64, buffer=input_memory.buf)
+        numbers[:] = data
+        del numbers
+        step = max(1, math.ceil(size / (processes * 4)))
+        tasks = [
+            (
+                input_memory.name,
+                output_memory.name,
+                start,
+                min(start + step, size),
+                mode,
+            )
+            for start in range(0, size, step)
+        ]
+        if ipc is None:
+            pool.starmap(process_shared_range, tasks, 1)
+        else:
+            payloads = [ipc_payload(ipc, task) for task in tasks]
+            task = functools.partial(ipc_task, process_shared_range)
+            for reply in pool.map(task, payloads, 1):
+                ipc_result(ipc, reply)
+        output = np.ndarray(size, dtype=np.uint64, buffer=output_memory.buf).copy()
+    finally:
+        input_memory.close()
+        input_memory.unlink()
+        output_memory.close()
+        output_memory.unlink()
+    return output
+
+
+def steal_work(thief: int, prefix: np.ndarray, bounds, locks) -> bool:
+    while True:
+        victim, most = -1, 0.0
+        for worker_id in range(len(locks)):
+            head, tail = bounds[2 * worker_id], bounds[2 * worker_id + 1]
+            if head < tail and prefix[tail] - prefix[head] > most:
+                victim, most = worker_id, prefix[tail] - prefix[head]
+        if victim < 0:
+            return False
+        with locks[victim]:
+            head, tail = bounds[2 * victim], bounds[2 * victim + 1]
+            if head >= tail:
+                continue
+            split = int(prefix.searchsorted((prefix[head] + prefix[tail]) / 2))
+            split = min(max(split, head), tail - 1)
+            bounds[2 * victim + 1] = split
+        with locks[thief]:
+            bounds[2 * thief], bounds[2 * thief + 1] = split, tail
+        return True
+
+
+def stealing_worker(
+    worker_id, numbers, tasks, prefix, bounds, locks, grain, steal, mode, out_queue
+):
+    start = time.process_time()
+    done = []
+    results = []
+    steals = 0
+    while True:
+        with locks[worker_id]:
+            head, tail = bounds[2 * worker_id], bounds[2 * worker_id + 1]
+            if head < tail:
+                end = int(prefix.searchsorted(prefix[head] + grain))
+                end = min(max(end, head + 1), tail)
+                bounds[2 * worker_id] = end
+        if head < tail:
+            batch = tasks[head:end]
+            done.append(batch)
+            results.extend(process_number(num) for num in numbers[batch].tolist())
+        elif steal and steal_work(worker_id, prefix, bounds, locks):
+            steals += 1
+        else:
+            break
+    indices = np.concatenate(done) if done else np.empty(0, dtype=np.int64)
+    out_queue.put(
+        (
+            worker_id,
+            time.process_time() - start,
+            steals,
+            indices.tobytes(),
+            encode_results(results, mode),
+        )
+    )
+
+
+@time_check
+def variant_f_work_stealing(
+    data: list[int],
+    processes: int | None = None,
+    mode: str = "full",
+    steal: bool = True,
+    largest_first: bool = True,
+    stats: dict | None = None,
+) -> list:
+    processes = processes or mp.cpu_count()
+    numbers = np.asarray(data, dtype=np.int64)
+    costs = estimate_cost(numbers)
+    if largest_first:
+        order = np.argsort(-costs, kind="stable")
+        segments = [order[worker_id::processes] for worker_id in range(processes)]
+    else:
+        segments = np.array_split(np.arange(len(numbers)), processes)
+    tasks = np.concatenate(segments).astype(np.int64)
+    prefix = np.concatenate(([0.0], np.cumsum(costs[tasks])))
+
+    bounds = mp.Array("q", 2 * processes, lock=False)
+    position = 0
+    for worker_id, segment in enumerate(segments):
+        bounds[2 * worker_id] = position
+        position += len(segment)
+        bounds[2 * worker_id + 1] = position
+    locks = [mp.Lock() for _ in range(processes)]
+    grain = prefix[-1] / (processes * BATCHES_PER_WORKER)
+    out_queue = mp.Queue()
+
+    workers = [
+        mp.Process(
+            target=stealing_worker,
+            args=(
+                worker_id,
+                numbers,
+                tasks,
+                prefix,
+                bounds,
+                locks,
+                grain,
+                steal,
+                mode,
+                out_queue,
+            ),
+        )
+        for worker_id in range(processes)
+    ]
+    for p in workers:
+        p.start()
+
+    results = [None] * len(data)
+    busy = [0.0] * processes
+    steals = 0
+    for _ in range(processes):
+        worker_id, cpu_time, worker_steals, indices, buffer = out_queue.get()
+        busy[worker_id] = cpu_time
+        steals += worker_steals
+        for index, value in zip(
+            np.frombuffer(indices, dtype=np.int64).tolist(),
+            decode_results(buffer, mode),
+        ):
+            results[index] = value
+
+    for p in workers:
+        p.join()
+
+    if stats is not None:
+        stats.update(busy=busy, steals=steals)
+    return results
 
 
-def run_benchmark(data_sizes):
-    results = {
-        "Размер данных": data_sizes,
-        "Последовательная обработка": [],
-        "ThreadPoolExecutor": [],
-        "ProcessPool": [],
-        "Process + Queue": [],
+def measure_ipc(data: list[int]) -> dict:
+    pool = get_pool()
+    runs = {
+        "ProcessPool": functools.partial(variant_b_process_pool, pool=pool),
+        "Process + Queue": variant_c_process_queue,
+        **{
+            f"Chunked pool ({mode})": functools.partial(
+                variant_d_chunked_pool, mode=mode, pool=pool
+            )
+            for mode in RESULT_MODES
+        },
+        "Shared memory (bit_length)": functools.partial(
+            variant_e_shared_memory, pool=pool
+        ),
     }
+    ipc = {}
+    for name, run in runs.items():
+        ipc[name] = dict.fromkeys(("sent", "sent_time", "received", "received_time"), 0)
+        run(data, ipc=ipc[name])
+    return ipc
 
-    for size in data_sizes:
-        print(f"\n--- Тестирование с размером данных: {size} ---")
 
-        data = generate_data(size)
+def print_ipc(ipc: dict):
+    for name, stats in ipc.items():
+        print(
+            f"  IPC {name}: отправлено {stats['sent'] / 1024:.0f} KB, "
+            f"получено {stats['received'] / 2**20:.1f} MB, "
+            f"pickle {(stats['sent_time'] + stats['received_time']) * 1000:.1f} ms"
+        )
+
+
+@time_check
+def sequential_processing(data: list[int]) -> list[int]:
+    return [process_number(num) for num in data]
 
-        sequential_result, sequential_time = sequential_processing(data)
-        results["Последовательная обработка"].append(sequential_time)
 
-        thread_result, thread_time = variant_a_thread_pool(data)
-        results["ThreadPoolExecutor"].append(thread_time)
+@time_check
+def sequential_naive(data: list[int]) -> list[int]:
+    return [factorial_naive(num) for num in data]
 
-        process_pool_result, process_pool_time = variant_b_process_pool(data)
-        results["ProcessPool"].append(process_pool_time)
 
-        process_queue_result, process_queue_time = variant_c_process_queue(data)
-        results["Process + Queue"].append(process_queue_time)
+@time_check
+def sequential_batch(data: list[int]) -> list[int]:
+    return factorial_many(data)
+
+
+def with_pool(func):
+    return functools.partial(func, pool=get_pool())
+
+
+def with_thread_pool(func):
+    return functools.partial(func, executor=get_thread_pool())
+
+
+def bit_lengths(results: list[int]) -> list[int]:
+    return [result.bit_length() for result in results]
+
+
+def batch_bit_lengths(data: list[int]) -> list[int]:
+    return bit_lengths(factorial_many(data))
+
+
+VARIANTS = benchmark.Registry()
+VARIANTS.add("Наивный цикл", sequential_naive.__wrapped__)
+VARIANTS.add("Последовательная обработка", sequential_processing.__wrapped__)
+VARIANTS.add("Пакетная обработка", sequential_batch.__wrapped__)
+VARIANTS.add(
+    "ThreadPoolExecutor",
+    variant_a_thread_pool.__wrapped__,
+    setup=with_thread_pool,
+    teardown=close_pools,
+)
+VARIANTS.add(
+    "ProcessPool",
+    variant_b_process_pool.__wrapped__,
+    setup=with_pool,
+    teardown=close_pools,
+)
+VARIANTS.add("Process + Queue", variant_c_process_queue.__wrapped__)
+VARIANTS.add(
+    "Chunked pool",
+    variant_d_chunked_pool.__wrapped__,
+    setup=with_pool,
+    teardown=close_pools,
+)
+VARIANTS.add(
+    "Chunked pool (bit_length)",
+    functools.partial(variant_d_chunked_pool.__wrapped__, mode="bit_length"),
+    setup=with_pool,
+    teardown=close_pools,
+    expected=bit_lengths,
+)
+VARIANTS.add("Work stealing", variant_f_work_stealing.__wrapped__)
+VARIANTS.add(
+    "Shared memory (bit_length)",
+    variant_e_shared_memory.__wrapped__,
+    setup=with_pool,
+    teardown=close_pools,
+    expected=bit_lengths,
+)
+
+DISTRIBUTION_VARIANTS = benchmark.Registry()
+DISTRIBUTION_VARIANTS.add("Пакетная обработка (bit_length)", batch_bit_lengths)
+DISTRIBUTION_VARIANTS.add(
+    "ProcessPool (bit_length)",
+    functools.partial(variant_b_process_pool.__wrapped__, func=factorial_bit_length),
+    setup=with_pool,
+    teardown=close_pools,
+)
+DISTRIBUTION_VARIANTS.add(
+    "Chunked pool (bit_length)",
+    functools.partial(variant_d_chunked_pool.__wrapped__, mode="bit_length"),
+    setup=with_pool,
+    teardown=close_pools,
+)
+DISTRIBUTION_VARIANTS.add(
+    "Shared memory (bit_length)",
+    variant_e_shared_memory.__wrapped__,
+    setup=with_pool,
+    teardown=close_pools,
+)
+
+
+def run_benchmark(data_sizes, warmup: int = 1, trials: int = 5, output=None):
+    records = benchmark.run_suite(VARIANTS, data_sizes, generate_data, warmup, trials)
+
+    results = {"Размер данных": list(data_sizes)}
+    for size in data_sizes:
+        print(f"\n--- Тестирование с размером данных: {size} ---")
+        size_records = [record for record in records if record["size"] == size]
+        benchmark.print_records(size_records)
+        naive_time = size_records[0]["median"]
+        for record in size_records:
+            results.setdefault(record["variant"], []).append(record["median"])
+            if record is not size_records[0]:
+                print(
+                    f"{record['variant']}: "
+                    f"ускорение x{naive_time / record['median']:.1f} к наивному циклу"
+                )
+        print_ipc(measure_ipc(generate_data(size)))
+    close_pools()
+
+    if output:
+        for extension in (".json", ".csv"):
+            benchmark.save_results(records, output + extension)
+        print(f"\nРезультаты сохранены в {output}.json и {output}.csv")
 
     return results
 
@@ -127,17 +643,10 @@ def visualize_results(results):
 
     plt.figure(figsize=(10, 6))
 
-    plt.plot(
-        data_sizes,
-        results["Последовательная обработка"],
-        "o-",
-        label="Последовательная обработка",
-    )
-    plt.plot(
-        data_sizes, results["ThreadPoolExecutor"], "s-", label="ThreadPoolExecutor"
-    )
-    plt.plot(data_sizes, results["ProcessPool"], "^-", label="ProcessPool")
-    plt.plot(data_sizes, results["Process + Queue"], "D-", label="Process + Queue")
+    markers = "ov^sDPX*hd<>"
+    variants = [name for name in results if name != "Размер данных"]
+    for marker, name in zip(markers, variants):
+        plt.plot(data_sizes, results[name], f"{marker}-", label=name)
 
     plt.xlabel("Размер данных")
     plt.ylabel("Время выполнения (секунды)")
@@ -159,13 +668,96 @@ def visualize_results(results):
     return filepath
 
 
+def run_distribution_benchmark(data_sizes, warmup: int = 1, trials: int = 3):
+    records = benchmark.run_suite(
+        DISTRIBUTION_VARIANTS, data_sizes, generate_data, warmup, trials
+    )
+    for size in data_sizes:
+        print(f"\n--- Распределение данных, размер: {size} ---")
+        benchmark.print_records(
+            [record for record in records if record["size"] == size]
+        )
+    return records
+
+
+def skew_variants(processes: int) -> benchmark.Registry:
+    variants = benchmark.Registry()
+    variants.add("Пакетная обработка", sequential_batch.__wrapped__)
+    variants.add(
+        "ProcessPool",
+        variant_b_process_pool.__wrapped__,
+        setup=lambda func: functools.partial(func, pool=get_pool(processes)),
+        teardown=close_pools,
+    )
+    variants.add(
+        "Process + Queue",
+        functools.partial(variant_c_process_queue.__wrapped__, processes=processes),
+    )
+    variants.add(
+        "Статическое разбиение",
+        functools.partial(
+            variant_f_work_stealing.__wrapped__,
+            processes=processes,
+            steal=False,
+            largest_first=False,
+        ),
+    )
+    variants.add(
+        "Work stealing",
+        functools.partial(variant_f_work_stealing.__wrapped__, processes=processes),
+    )
+    return variants
+
+
+def run_skew_benchmark(
+    size: int = 2000, processes: int = 4, warmup: int = 1, trials: int = 3
+):
+    print(f"Количество ядер CPU: {mp.cpu_count()}, процессов: {processes}")
+    variants = skew_variants(processes)
+    for skew in SKEWS:
+        print(f"\n--- Распределение {skew}, размер: {size} ---")
+        data = generate_skewed_data(size, skew, seed=1)
+        records = benchmark.run_suite(
+            variants, [size], lambda size: data, warmup, trials
+        )
+        benchmark.print_records(records)
+
+        for name, steal, largest_first in (
+            ("Статическое разбиение", False, False),
+            ("Largest-first без краж", False, True),
+            ("Work stealing", True, True),
+        ):
+            stats = {}
+            variant_f_work_stealing(
+                data, processes, steal=steal, largest_first=largest_first, stats=stats
+            )
+            busy = stats["busy"]
+            mean = sum(busy) / len(busy)
+            print(
+                f"  {name}: самый долгий воркер {max(busy):.3f}s CPU, "
+                f"средний {mean:.3f}s, дисбаланс x{max(busy) / mean:.2f}, "
+                f"кражи {stats['steals']}"
+            )
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "skew":
+        run_skew_benchmark(*[int(float(arg)) for arg in sys.argv[2:]])
+        return
+
+    if len(sys.argv) > 1:
+        run_distribution_benchmark([int(float(size)) for size in sys.argv[1:]])
+        return
+
     data_sizes = [1000, 5000, 10000, 20000]
 
     print(f"Запуск тестирования для размеров данных: {data_sizes}")
     print(f"Количество ядер CPU: {mp.cpu_count()}")
 
-    results = run_benchmark(data_sizes)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    results = run_benchmark(
+        data_sizes, output=os.path.join("results", f"benchmark_{timestamp}")
+    )
 
     visualize_results(results)
 
@@ -1,3 +1,8 @@
+import bisect
+
+import numpy as np
+
+
 def search(array: list[int], number: int) -> bool:
     left, right = 0, len(array) - 1
     while left <= right:
@@ -11,7 +16,138 @@ def search(array: list[int], number: int) -> bool:
     return False
 
 
+def lower_bound(array: list[int], number: int) -> int:
+    return bisect.bisect_left(array, number)
+
+
+def upper_bound(array: list[int], number: int) -> int:
+    return bisect.bisect_right(array, number)
+
+
+def count_range(array: list[int], low: int, high: int) -> int:
+    return max(0, bisect.bisect_right(array, high) - bisect.bisect_left(array, low))
+
+
+def insertion_points(
+    array: np.ndarray, queries, side: str = "left", sort_queries: bool = False
+) -> np.ndarray:
+    queries = np.asarray(queries)
+    if not sort_queries:
+        return np.searchsorted(array, queries, side=side)
+    order = np.argsort(queries, kind="stable")
+    indices = np.empty(len(queries), dtype=np.intp)
+    indices[order] = np.searchsorted(array, queries[order], side=side)
+    return indices
+
+
+def search_many(array: np.ndarray, queries, sort_queries: bool = False) -> np.ndarray:
+    queries = np.asarray(queries)
+    if not len(array):
+        return np.zeros(len(queries), dtype=bool)
+    indices = insertion_points(array, queries, sort_queries=sort_queries)
+    np.minimum(indices, len(array) - 1, out=indices)
+    return array[indices] == queries
+
+
+def count_range_many(array: np.ndarray, lows, highs) -> np.ndarray:
+    counts = np.searchsorted(array, highs, side="right") - np.searchsorted(
+        array, lows, side="left"
+    )
+    return np.maximum(counts, 0)
+
+
+def eytzinger_order(size: int, chunk_size: int = 1 << 22) -> np.ndarray:
+    order = np.empty(size + 1, dtype=np.intp)
+    order[0] = size
+    height = size.bit_length()
+    last_level = size - ((1 << max(height - 1, 0)) - 1)
+    for start in range(1, size + 1, chunk_size):
+        nodes = np.arange(start, min(start + chunk_size, size + 1), dtype=np.int64)
+        depth = np.frexp(nodes)[1].astype(np.int64) - 1
+        perfect = (2 * (nodes - (1 << depth)) + 1) * (1 << (height - 1 - depth)) - 1
+        missing = np.clip((perfect + 1) // 2 - last_level, 0, None)
+        order[start : start + len(nodes)] = perfect - missing
+    return order
+
+
+class EytzingerArray:
+    def __init__(self, sorted_array):
+        sorted_array = np.asarray(sorted_array)
+        self.size = len(sorted_array)
+        self.order = eytzinger_order(self.size)
+        self.tree = np.empty(self.size + 1, dtype=sorted_array.dtype)
+        self.tree[1:] = sorted_array[self.order[1:]]
+
+    def descend(self, queries: np.ndarray) -> np.ndarray:
+        tree = self.tree
+        size = self.size
+        nodes = np.ones(len(queries), dtype=np.intp)
+        for _ in range(size.bit_length() - 1):
+            nodes = 2 * nodes + (tree[nodes] < queries)
+        inside = nodes <= size
+        nodes[inside] = 2 * nodes[inside] + (tree[nodes[inside]] < queries[inside])
+        return nodes // (2 * ((nodes + 1) & ~nodes))
+
+    def lower_bound_many(self, queries) -> np.ndarray:
+        queries = np.asarray(queries)
+        if not self.size:
+            return np.zeros(len(queries), dtype=np.intp)
+        return self.order[self.descend(queries)]
+
+    def search_many(self, queries) -> np.ndarray:
+        queries = np.asarray(queries)
+        if not self.size:
+            return np.zeros(len(queries), dtype=bool)
+        nodes = self.descend(queries)
+        return (nodes != 0) & (self.tree[nodes] == queries)
+
+    def find(self, number) -> int:
+        tree = self.tree
+        size = self.size
+        node = 1
+        while node <= size:
+            node = 2 * node + 1 if tree[node] < number else 2 * node
+        return node >> (~node & (node + 1)).bit_length()
+
+    def lower_bound(self, number) -> int:
+        return int(self.order[self.find(number)])
+
+    def __contains__(self, number) -> bool:
+        node = self.find(number)
+        return node != 0 and self.tree[node] == number
+
+    def __len__(self) -> int:
+        return self.size
+
+
 if __name__ == "__main__":
     array = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
     number = 3
     print(search(array, number))
+
+    assert lower_bound(array, 3) == 2
+    assert upper_bound(array, 3) == 3
+    assert count_range(array, 3, 6) == 4
+    assert count_range(array, 6, 3) == 0
+
+    sorted_array = np.array([1, 3, 3, 5, 8, 13, 21])
+    queries = np.array([0, 1, 3, 4, 21, 22])
+    found = search_many(sorted_array, queries)
+    assert found.tolist() == [False, True, True, False, True, False]
+    assert insertion_points(sorted_array, queries).tolist() == [0, 0, 1, 3, 6, 7]
+    indices = insertion_points(sorted_array, queries[::-1], sort_queries=True)
+    assert indices.tolist() == [7, 6, 3, 1, 0, 0]
+    assert count_range_many(sorted_array, [3, 0, 9], [5, 100, 8]).tolist() == [3, 7, 0]
+    assert not search_many(np.array([], dtype=np.int64), [1]).any()
+
+    rng = np.random.default_rng(1)
+    for size in list(range(0, 70)) + [1000, 4095, 4096, 4097]:
+        values = np.sort(rng.integers(0, 3 * size + 1, size))
+        queries = rng.integers(-1, 3 * size + 2, 500)
+        eytzinger = EytzingerArray(values)
+        expected = np.searchsorted(values, queries)
+        assert (eytzinger.lower_bound_many(queries) == expected).all()
+        assert (eytzinger.search_many(queries) == search_many(values, queries)).all()
+        for query in queries[:20].tolist():
+            assert eytzinger.lower_bound(query) == bisect.bisect_left(values, query)
+            assert (query in eytzinger) == search(values.tolist(), query)
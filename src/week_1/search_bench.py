@@ -0,0 +1,80 @@
+import bisect
+import sys
+import time
+
+import numpy as np
+
+from search import EytzingerArray, search, search_many
+
+QUERIES = 100_000
+LIST_LIMIT = 10**7
+
+
+def timed(func, queries: int) -> tuple[object, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) / queries * 1e9
+
+
+def bench(size: int, rng: np.random.Generator):
+    values = np.sort(rng.integers(0, 4 * size, size, dtype=np.int64))
+    queries = np.concatenate(
+        [
+            rng.choice(values, QUERIES // 2),
+            rng.integers(0, 4 * size, QUERIES - QUERIES // 2, dtype=np.int64),
+        ]
+    )
+    rng.shuffle(queries)
+
+    expected, elapsed = timed(lambda: search_many(values, queries), QUERIES)
+    results = {"search_many": elapsed}
+
+    found, elapsed = timed(
+        lambda: search_many(values, queries, sort_queries=True), QUERIES
+    )
+    assert (found == expected).all()
+    results["search_many(sorted)"] = elapsed
+
+    start = time.perf_counter()
+    eytzinger = EytzingerArray(values)
+    build = time.perf_counter() - start
+    found, elapsed = timed(
+        lambda eytzinger=eytzinger: eytzinger.search_many(queries), QUERIES
+    )
+    assert (found == expected).all()
+    results["Eytzinger batch"] = elapsed
+    del eytzinger
+
+    if size <= LIST_LIMIT:
+        array = values.tolist()
+        query_list = queries.tolist()
+        found, elapsed = timed(
+            lambda: [search(array, query) for query in query_list], QUERIES
+        )
+        assert found == expected.tolist()
+        results["search (цикл)"] = elapsed
+
+        def bisect_loop():
+            size = len(array)
+            result = []
+            for query in query_list:
+                index = bisect.bisect_left(array, query)
+                result.append(index < size and array[index] == query)
+            return result
+
+        found, elapsed = timed(bisect_loop, QUERIES)
+        assert found == expected.tolist()
+        results["bisect (цикл)"] = elapsed
+        del array
+
+    print(f"\n--- n = {size:.0e}, {QUERIES} запросов ---")
+    for name, elapsed in results.items():
+        print(f"{name:>20}: {elapsed:8.1f} нс/запрос")
+    print(f"{'Eytzinger build':>20}: {build:8.3f} s")
+
+
+if __name__ == "__main__":
+    max_exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    rng = np.random.default_rng(1)
+    for exponent in range(3, max_exponent + 1):
+        bench(10**exponent, rng)
@@ -0,0 +1,260 @@
+import contextlib
+import fcntl
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+import zlib
+
+from lru_cache import MISSING, decode_key, encode_key, lru_cache
+
+SHM_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+MAGIC = b"LRUSHM01"
+HEADER = struct.Struct("<8sQQQ")
+SLOT = struct.Struct("<QQdII")
+SEQ = struct.Struct("<Q")
+STAMP = struct.Struct("<d")
+COUNT_OFFSET = 24
+MAX_SPINS = 10_000
+
+
+class SharedMemoryCache:
+    def __init__(
+        self,
+        name: str,
+        maxsize: int = 4096,
+        slot_size: int = 1024,
+        ways: int = 8,
+        path: str | None = None,
+    ):
+        self.path = path or os.path.join(SHM_DIR, f"{name}.lru")
+        self.ways = ways
+        self.thread_lock = threading.Lock()
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self.locked():
+            if os.fstat(self.fd).st_size == 0:
+                os.ftruncate(self.fd, HEADER.size + maxsize * slot_size)
+                self.buffer = mmap.mmap(self.fd, 0)
+                HEADER.pack_into(self.buffer, 0, MAGIC, maxsize, slot_size, 0)
+            else:
+                self.buffer = mmap.mmap(self.fd, 0)
+        magic, self.maxsize, self.slot_size, _ = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a shared cache file")
+        self.capacity = self.slot_size - SLOT.size
+
+    @contextlib.contextmanager
+    def locked(self):
+        with self.thread_lock:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN)
+
+    def slots(self, h: int) -> list[int]:
+        base = h % self.maxsize
+        return [
+            HEADER.size + (base + way) % self.maxsize * self.slot_size
+            for way in range(min(self.ways, self.maxsize))
+        ]
+
+    def read(self, offset: int, h: int, key_bytes: bytes):
+        buffer = self.buffer
+        for _ in range(MAX_SPINS):
+            seq, slot_hash, _, key_len, value_len = SLOT.unpack_from(buffer, offset)
+            if seq & 1:
+                continue
+            result = None
+            if slot_hash == h and key_len == len(key_bytes):
+                start = offset + SLOT.size
+                if buffer[start : start + key_len] == key_bytes:
+                    start += key_len
+                    result = buffer[start : start + value_len]
+            if SEQ.unpack_from(buffer, offset)[0] == seq:
+                return result
+        return None
+
+    def write(self, offset: int, h: int, data: bytes, key_len: int):
+        buffer = self.buffer
+        seq = SEQ.unpack_from(buffer, offset)[0] | 1
+        SEQ.pack_into(buffer, offset, seq)
+        start = offset + SLOT.size
+        buffer[start : start + len(data)] = data
+        SLOT.pack_into(
+            buffer, offset, seq, h, time.monotonic(), key_len, len(data) - key_len
+        )
+        SEQ.pack_into(buffer, offset, seq + 1)
+
+    def erase(self, offset: int):
+        buffer = self.buffer
+        seq = SEQ.unpack_from(buffer, offset)[0] | 1
+        SEQ.pack_into(buffer, offset, seq)
+        SLOT.pack_into(buffer, offset, seq, 0, 0.0, 0, 0)
+        SEQ.pack_into(buffer, offset, seq + 1)
+
+    def add_count(self, delta: int):
+        count = SEQ.unpack_from(self.buffer, COUNT_OFFSET)[0]
+        SEQ.pack_into(self.buffer, COUNT_OFFSET, count + delta)
+
+    def find(self, h: int, key_bytes: bytes):
+        for offset in self.slots(h):
+            if self.read(offset, h, key_bytes) is not None:
+                return offset
+        return None
+
+    def get(self, key, default=MISSING):
+        key_bytes = encode_key(key)
+        h = zlib.crc32(key_bytes)
+        maxsize = self.maxsize
+        index = h % maxsize
+        for _ in range(min(self.ways, maxsize)):
+            offset = HEADER.size + index * self.slot_size
+            value = self.read(offset, h, key_bytes)
+            if value is not None:
+                STAMP.pack_into(self.buffer, offset + 16, time.monotonic())
+                return pickle.loads(value)
+            index = index + 1 if index + 1 < maxsize else 0
+        return default
+
+    def put(self, key, value):
+        key_bytes = encode_key(key)
+        data = key_bytes + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        h = zlib.crc32(key_bytes)
+        with self.locked():
+            if len(data) > self.capacity:
+                offset = self.find(h, key_bytes)
+                if offset is not None:
+                    self.erase(offset)
+                    self.add_count(-1)
+                return
+            target = self.find(h, key_bytes)
+            if target is None:
+                oldest = None
+                for offset in self.slots(h):
+                    _, _, stamp, key_len, _ = SLOT.unpack_from(self.buffer, offset)
+                    if not key_len:
+                        target = offset
+                        self.add_count(1)
+                        break
+                    if oldest is None or stamp < oldest:
+                        target, oldest = offset, stamp
+            self.write(target, h, data, len(key_bytes))
+
+    def pop(self, key, default=None):
+        key_bytes = encode_key(key)
+        h = zlib.crc32(key_bytes)
+        with self.locked():
+            for offset in self.slots(h):
+                value = self.read(offset, h, key_bytes)
+                if value is not None:
+                    self.erase(offset)
+                    self.add_count(-1)
+                    return pickle.loads(value)
+        return default
+
+    def items(self) -> list:
+        items = []
+        buffer = self.buffer
+        for index in range(self.maxsize):
+            offset = HEADER.size + index * self.slot_size
+            with self.locked():
+                _, _, _, key_len, value_len = SLOT.unpack_from(buffer, offset)
+                if not key_len:
+                    continue
+                start = offset + SLOT.size
+                data = buffer[start : start + key_len + value_len]
+            items.append((decode_key(data[:key_len]), pickle.loads(data[key_len:])))
+        return items
+
+    def clear(self):
+        with self.locked():
+            for index in range(self.maxsize):
+                offset = HEADER.size + index * self.slot_size
+                if SLOT.unpack_from(self.buffer, offset)[3]:
+                    self.erase(offset)
+            SEQ.pack_into(self.buffer, COUNT_OFFSET, 0)
+
+    def close(self):
+        self.buffer.close()
+        os.close(self.fd)
+
+    def unlink(self):
+        self.close()
+        os.remove(self.path)
+
+    def __len__(self) -> int:
+        return SEQ.unpack_from(self.buffer, COUNT_OFFSET)[0]
+
+
+def cached_square_worker(name: str, numbers: list[int], calls):
+    @lru_cache(backend=SharedMemoryCache(name))
+    def square(x: int) -> int:
+        with calls.get_lock():
+            calls.value += 1
+        return x * x
+
+    for x in numbers:
+        assert square(x) == x * x
+
+
+if __name__ == "__main__":
+    import multiprocessing as mp
+
+    name = f"shared_cache_test_{os.getpid()}"
+    cache = SharedMemoryCache(name, maxsize=64, slot_size=256)
+    cache.put("a", {"x": 1})
+    cache.put(("b", 2), [1, 2, 3])
+    assert cache.get("a") == {"x": 1}
+    assert cache.get(("b", 2)) == [1, 2, 3]
+    assert cache.get("missing", None) is None
+    assert len(cache) == 2
+
+    cache.put("a", {"x": 2})
+    assert cache.get("a") == {"x": 2}
+    assert len(cache) == 2
+    cache.put("a", "x" * 1000)
+    assert cache.get("a", None) is None
+    assert len(cache) == 1
+
+    for i in range(1000):
+        cache.put(i, i)
+    assert len(cache) == 64
+    assert len(cache.items()) == 64
+    assert 999 in dict(cache.items())
+
+    other = SharedMemoryCache(name)
+    assert other.maxsize == 64
+    assert other.get(999) == 999
+    other.close()
+
+    key_bytes = encode_key(999)
+    h = zlib.crc32(key_bytes)
+    offset = cache.find(h, key_bytes)
+    SEQ.pack_into(cache.buffer, offset, 7)
+    assert cache.get(999, None) is None
+    with cache.locked():
+        cache.write(offset, h, key_bytes + pickle.dumps(1000), len(key_bytes))
+    assert SEQ.unpack_from(cache.buffer, offset)[0] == 8
+    assert cache.get(999) == 1000
+
+    cache.clear()
+    assert len(cache) == 0
+
+    calls = mp.Value("i", 0)
+    workers = [
+        mp.Process(target=cached_square_worker, args=(name, list(range(32)), calls))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+    assert len(cache) == 32
+    assert cache.get(5) == 25
+    assert calls.value < 4 * 32
+    cache.unlink()
@@ -0,0 +1,120 @@
+import multiprocessing as mp
+import os
+import time
+import timeit
+
+from lru_cache import LRUCache, lru_cache
+from shared_cache import SharedMemoryCache
+
+PROCESSES = 8
+KEYS = 4000
+VALUE_SIZE = 800
+
+
+def pss_kb() -> int:
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def make_value(key: int) -> bytes:
+    return key.to_bytes(8, "little") * (VALUE_SIZE // 8)
+
+
+def bench_hit_latency(number: int = 200_000):
+    print("\n--- hit latency ---")
+    name = f"shared_cache_bench_{os.getpid()}"
+    shared = SharedMemoryCache(name, maxsize=8192)
+    try:
+        caches = {
+            "LRUCache": LRUCache(8192),
+            "SharedMemoryCache": shared,
+        }
+        for value_name, value in (("int", 42), (f"{VALUE_SIZE}B", make_value(42))):
+            for cache_name, cache in caches.items():
+                cache.put(7, value)
+                elapsed = timeit.timeit(lambda: cache.get(7), number=number)
+                print(
+                    f"{cache_name:>18} get, {value_name:>5}: "
+                    f"{elapsed / number * 1e9:7.0f} нс/вызов"
+                )
+            for cache_name, options in (
+                ("lru_cache", {"maxsize": 8192}),
+                ("lru_cache(shared)", {"backend": shared}),
+            ):
+                cached = lru_cache(**options)(lambda key, value=value: value)
+                cached(7)
+                elapsed = timeit.timeit(lambda: cached(7), number=number)
+                print(
+                    f"{cache_name:>18} hit, {value_name:>5}: "
+                    f"{elapsed / number * 1e9:7.0f} нс/вызов"
+                )
+    finally:
+        shared.unlink()
+
+
+def worker(name: str | None, results, calls):
+    backend = SharedMemoryCache(name) if name else None
+    before = pss_kb()
+
+    @lru_cache(maxsize=None if backend else KEYS, backend=backend)
+    def compute(key: int) -> bytes:
+        with calls.get_lock():
+            calls.value += 1
+        return make_value(key)
+
+    start = time.perf_counter()
+    for key in range(KEYS):
+        compute(key)
+    for key in range(KEYS):
+        compute(key)
+    results.put((time.perf_counter() - start, pss_kb() - before))
+
+
+def run_workers(name: str | None) -> tuple[int, float, int]:
+    results = mp.Queue()
+    calls = mp.Value("i", 0)
+    processes = [
+        mp.Process(target=worker, args=(name, results, calls)) for _ in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return (
+        calls.value,
+        max(elapsed for elapsed, _ in stats),
+        sum(pss for _, pss in stats),
+    )
+
+
+def bench_processes():
+    print(
+        f"\n--- {PROCESSES} процессов, {KEYS} ключей по {VALUE_SIZE}B, "
+        "два прохода на процесс ---"
+    )
+    calls, elapsed, pss = run_workers(None)
+    print(
+        f"{'per-process':>12}: {calls:6d} вычислений, {elapsed:5.2f}s, "
+        f"прирост PSS {pss / 1024:6.1f} MB"
+    )
+
+    name = f"shared_cache_bench_{os.getpid()}"
+    shared = SharedMemoryCache(name, maxsize=2 * KEYS)
+    try:
+        calls, elapsed, pss = run_workers(name)
+        size_mb = os.path.getsize(shared.path) / 2**20
+        print(
+            f"{'shared':>12}: {calls:6d} вычислений, {elapsed:5.2f}s, "
+            f"прирост PSS {pss / 1024:6.1f} MB (файл кэша {size_mb:.1f} MB)"
+        )
+    finally:
+        shared.unlink()
+
+
+if __name__ == "__main__":
+    bench_hit_latency()
+    bench_processes()
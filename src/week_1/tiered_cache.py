@@ -0,0 +1,232 @@
+import pickle
+import threading
+import uuid
+
+import redis
+
+from lru_cache import MISSING, decode_key, encode_key, make_cache
+
+CLEAR_ALL = b"*"
+
+
+class TieredCache:
+    def __init__(
+        self,
+        namespace: str,
+        client: redis.Redis | None = None,
+        maxsize: int | None = 1024,
+        ttl: float | None = None,
+        policy="lru",
+        invalidate: bool = True,
+        host="localhost",
+        port=6379,
+        db=0,
+    ):
+        self.client = client or redis.Redis(host=host, port=port, db=db)
+        self.prefix = f"{namespace}:".encode()
+        self.channel = f"{namespace}:invalidate"
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.local = make_cache(maxsize, policy, ttl=ttl)
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.node_id = uuid.uuid4().hex.encode()
+        self.pubsub = None
+        self.listener = None
+        if invalidate:
+            self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            self.pubsub.subscribe(**{self.channel: self.on_invalidate})
+            self.listener = self.pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def on_invalidate(self, message: dict):
+        node_id, _, key_bytes = message["data"].partition(b" ")
+        if node_id == self.node_id:
+            return
+        with self.lock:
+            self.generation += 1
+            if key_bytes == CLEAR_ALL:
+                self.local.clear()
+            else:
+                self.local.pop(decode_key(key_bytes), None)
+
+    def write(self, pipe, key, value):
+        key_bytes = encode_key(key)
+        ttl = self.ttl(value) if callable(self.ttl) else self.ttl
+        pipe.set(
+            self.prefix + key_bytes,
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            px=int(ttl * 1000) if ttl is not None else None,
+        )
+        if self.pubsub is not None:
+            pipe.publish(self.channel, self.node_id + b" " + key_bytes)
+
+    def get(self, key, default=MISSING):
+        with self.lock:
+            value = self.local.get(key, MISSING)
+            generation = self.generation
+        if value is not MISSING:
+            return value
+        data = self.client.get(self.prefix + encode_key(key))
+        if data is None:
+            return default
+        value = pickle.loads(data)
+        with self.lock:
+            if generation == self.generation:
+                self.local.put(key, value)
+        return value
+
+    def get_many(self, keys) -> dict:
+        found = {}
+        missing = []
+        with self.lock:
+            generation = self.generation
+            for key in keys:
+                value = self.local.get(key, MISSING)
+                if value is MISSING:
+                    missing.append(key)
+                else:
+                    found[key] = value
+        if not missing:
+            return found
+        values = self.client.mget([self.prefix + encode_key(key) for key in missing])
+        fetched = {
+            key: pickle.loads(data)
+            for key, data in zip(missing, values)
+            if data is not None
+        }
+        with self.lock:
+            if generation == self.generation:
+                for key, value in fetched.items():
+                    self.local.put(key, value)
+        found.update(fetched)
+        return found
+
+    def put(self, key, value):
+        with self.client.pipeline(transaction=False) as pipe:
+            self.write(pipe, key, value)
+            pipe.execute()
+        with self.lock:
+            self.local.put(key, value)
+
+    def put_many(self, items: dict):
+        with self.client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                self.write(pipe, key, value)
+            pipe.execute()
+        with self.lock:
+            for key, value in items.items():
+                self.local.put(key, value)
+
+    def pop(self, key, default=None):
+        key_bytes = encode_key(key)
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.get(self.prefix + key_bytes)
+            pipe.delete(self.prefix + key_bytes)
+            if self.pubsub is not None:
+                pipe.publish(self.channel, self.node_id + b" " + key_bytes)
+            data = pipe.execute()[0]
+        with self.lock:
+            value = self.local.pop(key, MISSING)
+        if data is not None:
+            return pickle.loads(data)
+        return default if value is MISSING else value
+
+    def items(self) -> list:
+        with self.lock:
+            return self.local.items()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + b"*", count=1000))
+        with self.client.pipeline(transaction=False) as pipe:
+            for i in range(0, len(keys), 1000):
+                pipe.delete(*keys[i : i + 1000])
+            if self.pubsub is not None:
+                pipe.publish(self.channel, self.node_id + b" " + CLEAR_ALL)
+            pipe.execute()
+        with self.lock:
+            self.local.clear()
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener.join()
+            self.pubsub.close()
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+
+if __name__ == "__main__":
+    import itertools
+    import time
+
+    from lru_cache import lru_cache
+
+    try:
+        import fakeredis
+    except ImportError:
+        fakeredis = None
+
+    if fakeredis is not None:
+        server = fakeredis.FakeServer()
+
+        def connect() -> redis.Redis:
+            return fakeredis.FakeRedis(server=server)
+    else:
+
+        def connect() -> redis.Redis:
+            return redis.Redis()
+
+    def wait_for(condition, timeout: float = 2.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    node_a = TieredCache("tiered_cache_test", connect(), maxsize=16)
+    node_a.clear()
+    node_b = TieredCache("tiered_cache_test", connect(), maxsize=16)
+
+    node_a.put("rate", {"USD": 1.0})
+    wait_for(lambda: node_b.generation == 1)
+    assert node_b.get("rate") == {"USD": 1.0}
+    assert len(node_b) == 1
+
+    node_a.put("rate", {"USD": 2.0})
+    wait_for(lambda: len(node_b) == 0)
+    assert node_b.get("rate") == {"USD": 2.0}
+
+    node_a.put_many({i: i * i for i in range(10)})
+    found = node_b.get_many(list(range(12)))
+    assert found == {i: i * i for i in range(10)}
+
+    assert node_a.pop(3) == 9
+    wait_for(lambda: node_b.get(3, None) is None)
+
+    calls = itertools.count()
+
+    def square(x: int) -> int:
+        next(calls)
+        return x * x
+
+    cached_a = lru_cache(backend=node_a)(square)
+    cached_b = lru_cache(backend=node_b)(square)
+    assert cached_a(20) == 400
+    assert cached_b(20) == 400
+    assert next(calls) == 1
+    assert cached_b.map(range(18, 24)) == [x * x for x in range(18, 24)]
+    assert cached_b.cache_info()[:2] == (2, 5)
+    assert next(calls) == 7
+
+    node_a.clear()
+    wait_for(lambda: len(node_b) == 0)
+    assert node_b.get(20, None) is None
+
+    expiring = TieredCache("tiered_cache_ttl", connect(), ttl=0.1, invalidate=False)
+    expiring.put("a", 1)
+    assert expiring.get("a") == 1
+    time.sleep(0.15)
+    assert expiring.get("a", None) is None
+
+    node_a.close()
+    node_b.close()
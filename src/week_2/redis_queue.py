@@ -1,25 +1,404 @@
+import itertools
 import json
+import threading
+import time
+import uuid
+import weakref
+from collections import namedtuple
+
 import redis
 
+BATCH_SIZE = 1000
+PIPELINE_BATCHES = 16
+
+Message = namedtuple("Message", ["id", "body", "attempts", "receipt"])
+
 
 class RedisQueue:
-    def __init__(self, queue_name="default_queue", host="localhost", port=6379, db=0):
-        self.redis_client = redis.Redis(host=host, port=port, db=db)
+    def __init__(
+        self,
+        queue_name="default_queue",
+        host="localhost",
+        port=6379,
+        db=0,
+        client: redis.Redis | None = None,
+    ):
+        self.redis_client = client or redis.Redis(host=host, port=port, db=db)
         self.queue_name = queue_name
 
+    def encode(self, msg: dict) -> str:
+        return json.dumps(msg)
+
     def publish(self, msg: dict):
-        message = json.dumps(msg)
-        self.redis_client.rpush(self.queue_name, message)
+        self.redis_client.rpush(self.queue_name, self.encode(msg))
 
-    def consume(self) -> dict:
-        message = self.redis_client.lpop(self.queue_name)
+    def publish_many(
+        self,
+        messages,
+        batch_size: int = BATCH_SIZE,
+        pipeline_batches: int = PIPELINE_BATCHES,
+    ) -> int:
+        messages = iter(messages)
+        count = 0
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            while batch := [
+                self.encode(msg) for msg in itertools.islice(messages, batch_size)
+            ]:
+                pipe.rpush(self.queue_name, *batch)
+                count += len(batch)
+                if len(pipe) >= pipeline_batches:
+                    pipe.execute()
+            pipe.execute()
+        return count
+
+    def consume(self, timeout: float | None = None) -> dict:
+        if timeout is None:
+            message = self.redis_client.lpop(self.queue_name)
+        else:
+            item = self.redis_client.blpop(self.queue_name, timeout=timeout)
+            message = item[1] if item else None
         if message is None:
             raise ValueError("Очередь пуста")
         return json.loads(message)
 
+    def consume_many(self, n: int, timeout: float | None = None) -> list[dict]:
+        messages = self.redis_client.lpop(self.queue_name, n) or []
+        if not messages and timeout is not None:
+            item = self.redis_client.blpop(self.queue_name, timeout=timeout)
+            if item:
+                messages = [item[1]]
+                if n > 1:
+                    messages += self.redis_client.lpop(self.queue_name, n - 1) or []
+        return [json.loads(message) for message in messages]
+
+    def __len__(self) -> int:
+        return self.redis_client.llen(self.queue_name)
+
+
+NOW = """
+local time = redis.call("TIME")
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+"""
+
+MESSAGE_ID = """
+local function message_id(message)
+    return string.sub(message, 1, string.find(message, "\\n", 1, true) - 1)
+end
+local function receipt_id(receipt)
+    return string.match(receipt, "^[^:]*")
+end
+"""
+
+CONSUME_SCRIPT = (
+    NOW
+    + MESSAGE_ID
+    + """
+local deadline = now + tonumber(ARGV[2])
+local messages = redis.call("LPOP", KEYS[1], ARGV[1]) or {}
+local result = {#messages}
+local retried = redis.call("EXISTS", KEYS[4]) == 1
+for i = 1, #messages, 1000 do
+    local last = math.min(i + 999, #messages)
+    local ids, pending, leases = {}, {}, {}
+    for j = i, last do
+        ids[j - i + 1] = message_id(messages[j])
+    end
+    local counts = retried and redis.call("HMGET", KEYS[4], unpack(ids))
+    for j = i, last do
+        local k = j - i + 1
+        local count = counts and counts[k]
+        if count then
+            table.insert(result, j)
+            table.insert(result, count)
+        end
+        pending[2 * k - 1], pending[2 * k] = ids[k], messages[j]
+        leases[2 * k - 1], leases[2 * k] = deadline, ids[k] .. ":" .. (count or "0")
+    end
+    redis.call("HSET", KEYS[2], unpack(pending))
+    redis.call("ZADD", KEYS[3], unpack(leases))
+end
+return result
+"""
+)
+
+ARM_SCRIPT = (
+    NOW
+    + """
+redis.call("ZADD", KEYS[1], now + tonumber(ARGV[2]), ARGV[1])
+"""
+)
+
+EXTEND_SCRIPT = (
+    NOW
+    + """
+local deadline = now + tonumber(ARGV[1])
+local extended = 0
+for i = 2, #ARGV, 1000 do
+    local leases = {}
+    for j = i, math.min(i + 999, #ARGV) do
+        leases[2 * (j - i) + 1], leases[2 * (j - i) + 2] = deadline, ARGV[j]
+    end
+    extended = extended + redis.call("ZADD", KEYS[1], "XX", "GT", "CH", unpack(leases))
+end
+return extended
+"""
+)
+
+ACK_SCRIPT = (
+    MESSAGE_ID
+    + """
+local acked = 0
+local retried = redis.call("EXISTS", KEYS[3]) == 1
+for i = 1, #ARGV, 1000 do
+    local last = math.min(i + 999, #ARGV)
+    local scores = redis.call("ZMSCORE", KEYS[2], unpack(ARGV, i, last))
+    local receipts, ids = {}, {}
+    for j = i, last do
+        if scores[j - i + 1] then
+            table.insert(receipts, ARGV[j])
+            table.insert(ids, receipt_id(ARGV[j]))
+        end
+    end
+    if #receipts > 0 then
+        acked = acked + redis.call("ZREM", KEYS[2], unpack(receipts))
+        redis.call("HDEL", KEYS[1], unpack(ids))
+        if retried then
+            redis.call("HDEL", KEYS[3], unpack(ids))
+        end
+    end
+end
+return acked
+"""
+)
+
+RETRY = (
+    MESSAGE_ID
+    + """
+local function retry(message, front)
+    local id = message_id(message)
+    if redis.call("HINCRBY", KEYS[4], id, 1) >= tonumber(ARGV[1]) then
+        redis.call("HDEL", KEYS[4], id)
+        redis.call("RPUSH", KEYS[5], message)
+        return 0, 1
+    end
+    redis.call(front and "LPUSH" or "RPUSH", KEYS[1], message)
+    return 1, 0
+end
+"""
+)
+
+NACK_SCRIPT = (
+    RETRY
+    + """
+local requeued, dead = 0, 0
+for i = 2, #ARGV do
+    if redis.call("ZREM", KEYS[3], ARGV[i]) == 1 then
+        local id = receipt_id(ARGV[i])
+        local message = redis.call("HGET", KEYS[2], id)
+        redis.call("HDEL", KEYS[2], id)
+        local r, d = retry(message, false)
+        requeued, dead = requeued + r, dead + d
+    end
+end
+return {requeued, dead}
+"""
+)
+
+REAP_SCRIPT = (
+    NOW
+    + RETRY
+    + """
+local requeued, dead = 0, 0
+local function requeue(message)
+    local r, d = retry(message, true)
+    requeued, dead = requeued + r, dead + d
+end
+local expired = redis.call("ZRANGEBYSCORE", KEYS[3], "-inf", now)
+for i = #expired, 1, -1 do
+    local id = receipt_id(expired[i])
+    local message = redis.call("HGET", KEYS[2], id)
+    redis.call("HDEL", KEYS[2], id)
+    redis.call("ZREM", KEYS[3], expired[i])
+    if message then
+        requeue(message)
+    end
+end
+for _, consumer in ipairs(redis.call("ZRANGEBYSCORE", KEYS[6], "-inf", now)) do
+    local inbox = ARGV[2] .. consumer
+    local message = redis.call("RPOP", inbox)
+    while message do
+        requeue(message)
+        message = redis.call("RPOP", inbox)
+    end
+    redis.call("ZREM", KEYS[6], consumer)
+end
+return {requeued, dead}
+"""
+)
+
+
+class ReliableQueue(RedisQueue):
+    def __init__(
+        self,
+        queue_name="default_queue",
+        host="localhost",
+        port=6379,
+        db=0,
+        client: redis.Redis | None = None,
+        consumer: str | None = None,
+        visibility_timeout: float = 30.0,
+        max_deliveries: int = 5,
+    ):
+        super().__init__(queue_name, host, port, db, client)
+        self.consumer = consumer or uuid.uuid4().hex
+        self.pending = f"{queue_name}:pending"
+        self.leases = f"{queue_name}:leases"
+        self.attempts = f"{queue_name}:attempts"
+        self.dead_letter = f"{queue_name}:dead"
+        self.inboxes = f"{queue_name}:inboxes"
+        self.inbox_prefix = f"{queue_name}:inbox:"
+        self.inbox = self.inbox_prefix + self.consumer
+        self.visibility_timeout = visibility_timeout
+        self.max_deliveries = max_deliveries
+        self.id_prefix = uuid.uuid4().hex[:16]
+        self.ids = itertools.count()
+        self.consume_script = self.redis_client.register_script(CONSUME_SCRIPT)
+        self.arm_script = self.redis_client.register_script(ARM_SCRIPT)
+        self.extend_script = self.redis_client.register_script(EXTEND_SCRIPT)
+        self.ack_script = self.redis_client.register_script(ACK_SCRIPT)
+        self.nack_script = self.redis_client.register_script(NACK_SCRIPT)
+        self.reap_script = self.redis_client.register_script(REAP_SCRIPT)
+
+    def encode(self, msg: dict) -> str:
+        message_id = f"{self.id_prefix}{next(self.ids):016x}"
+        return f"{message_id}\n{json.dumps(msg)}"
+
+    def decode(self, message: bytes, attempts: int) -> Message:
+        message_id, _, body = message.partition(b"\n")
+        message_id = message_id.decode()
+        return Message(
+            message_id, json.loads(body), attempts, f"{message_id}:{attempts}"
+        )
+
+    def take(self, n: int, source: str | None = None) -> list[Message]:
+        if n <= 0:
+            return []
+        source = source or self.queue_name
+        with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrange(source, 0, n - 1)
+            self.consume_script(
+                keys=[source, self.pending, self.leases, self.attempts],
+                args=[n, int(self.visibility_timeout * 1000)],
+                client=pipe,
+            )
+            if source == self.inbox:
+                pipe.zrem(self.inboxes, self.consumer)
+            messages, (count, *retried), *_ = pipe.execute()
+        attempts = dict(zip(retried[::2], retried[1::2]))
+        return [
+            self.decode(message, int(attempts.get(i, 0)))
+            for i, message in enumerate(messages[:count], 1)
+        ]
+
+    def wait(self, timeout: float) -> list[Message]:
+        self.arm_script(
+            keys=[self.inboxes],
+            args=[self.consumer, int((self.visibility_timeout + timeout) * 1000)],
+        )
+        message = self.redis_client.blmove(
+            self.queue_name, self.inbox, timeout, "LEFT", "RIGHT"
+        )
+        if message is None:
+            self.redis_client.zrem(self.inboxes, self.consumer)
+            return []
+        return self.take(1, self.inbox)
+
+    def consume_many(self, n: int, timeout: float | None = None) -> list[Message]:
+        messages = self.take(n)
+        if messages or timeout is None or n <= 0:
+            return messages
+        messages = self.wait(timeout)
+        return messages + self.take(n - len(messages))
+
+    def consume(self, timeout: float | None = None) -> Message:
+        messages = self.consume_many(1, timeout)
+        if not messages:
+            raise ValueError("Очередь пуста")
+        return messages[0]
+
+    def extend(self, *receipts, timeout: float | None = None) -> int:
+        if not receipts:
+            return 0
+        timeout = self.visibility_timeout if timeout is None else timeout
+        return self.extend_script(
+            keys=[self.leases], args=[int(timeout * 1000), *receipts]
+        )
+
+    def ack(self, *receipts) -> int:
+        if not receipts:
+            return 0
+        return self.ack_script(
+            keys=[self.pending, self.leases, self.attempts], args=receipts
+        )
+
+    def retry_keys(self) -> list[str]:
+        return [
+            self.queue_name,
+            self.pending,
+            self.leases,
+            self.attempts,
+            self.dead_letter,
+            self.inboxes,
+        ]
+
+    def nack(self, *receipts) -> tuple[int, int]:
+        if not receipts:
+            return 0, 0
+        requeued, dead = self.nack_script(
+            keys=self.retry_keys(), args=[self.max_deliveries, *receipts]
+        )
+        return requeued, dead
+
+    def reap(self) -> tuple[int, int]:
+        requeued, dead = self.reap_script(
+            keys=self.retry_keys(), args=[self.max_deliveries, self.inbox_prefix]
+        )
+        return requeued, dead
+
+    def dead_letters(self, count: int = BATCH_SIZE) -> list[Message]:
+        return [
+            self.decode(message, self.max_deliveries)
+            for message in self.redis_client.lrange(self.dead_letter, 0, count - 1)
+        ]
+
+    def clear(self):
+        inboxes = list(self.redis_client.scan_iter(self.inbox_prefix + "*"))
+        self.redis_client.delete(*self.retry_keys(), *inboxes)
+
+
+def start_reaper(
+    queue: ReliableQueue, interval: float | None = None
+) -> threading.Thread:
+    ref = weakref.ref(queue)
+    interval = interval or queue.visibility_timeout / 2
+
+    def reap():
+        while True:
+            time.sleep(interval)
+            queue = ref()
+            if queue is None:
+                return
+            queue.reap()
+            del queue
+
+    thread = threading.Thread(target=reap, name="redis-queue-reaper", daemon=True)
+    thread.start()
+    return thread
+
 
 if __name__ == "__main__":
     q = RedisQueue()
+    q.redis_client.delete(q.queue_name)
     q.publish({"a": 1})
     q.publish({"b": 2})
     q.publish({"c": 3})
@@ -27,3 +406,108 @@ if __name__ == "__main__":
     assert q.consume() == {"a": 1}
     assert q.consume() == {"b": 2}
     assert q.consume() == {"c": 3}
+
+    try:
+        q.consume(timeout=0.1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError
+
+    assert q.publish_many({"n": i} for i in range(2500)) == 2500
+    assert len(q) == 2500
+    assert q.consume_many(3) == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert q.consume(timeout=1) == {"n": 3}
+    assert len(q.consume_many(5000)) == 2496
+    assert q.consume_many(10) == []
+    assert q.consume_many(10, timeout=0.1) == []
+    assert q.publish_many(({"n": i} for i in range(55)), 10, pipeline_batches=2) == 55
+    assert [m["n"] for m in q.consume_many(100)] == list(range(55))
+
+    reliable = ReliableQueue("reliable_queue", visibility_timeout=0.1, max_deliveries=3)
+    reliable.clear()
+    worker = ReliableQueue(
+        "reliable_queue",
+        client=reliable.redis_client,
+        visibility_timeout=0.1,
+        max_deliveries=3,
+    )
+    reliable.publish({"task": 1})
+    assert reliable.publish_many({"task": i} for i in range(2, 6)) == 4
+
+    message = worker.consume(timeout=1)
+    assert message.body == {"task": 1} and message.attempts == 0
+    assert worker.ack(message.receipt) == 1
+    assert len(reliable) == 4
+
+    lost = worker.consume_many(2)
+    assert [m.body for m in lost] == [{"task": 2}, {"task": 3}]
+    assert reliable.reap() == (0, 0)
+    time.sleep(0.15)
+    assert reliable.reap() == (2, 0)
+
+    messages = worker.consume_many(10)
+    assert [m.body["task"] for m in messages] == [2, 3, 4, 5]
+    assert [m.attempts for m in messages] == [1, 1, 0, 0]
+    assert worker.ack(*[m.receipt for m in messages if m.body["task"] != 3]) == 3
+
+    poison = messages[1]
+    assert worker.nack(poison.receipt) == (1, 0)
+    poison = worker.consume()
+    assert poison.attempts == 2
+    assert worker.nack(poison.receipt) == (0, 1)
+    assert [m.body for m in reliable.dead_letters()] == [{"task": 3}]
+    assert len(reliable) == 0
+    assert not reliable.redis_client.exists(
+        reliable.pending, reliable.leases, reliable.attempts, reliable.inboxes
+    )
+    assert reliable.consume_many(5, timeout=0.05) == []
+
+    reliable.publish_many([{"task": 7}, {"task": 7}])
+    first, second = worker.consume_many(2)
+    assert first.body == second.body and first.id != second.id
+    assert worker.ack(first.receipt) == 1 and worker.ack(first.receipt) == 0
+    assert worker.extend(second.receipt, timeout=1) == 1
+    assert worker.extend("missing") == 0
+    time.sleep(0.15)
+    assert reliable.reap() == (0, 0)
+    assert worker.ack(second.receipt) == 1
+
+    reliable.publish({"task": 8})
+    [waited] = worker.wait(timeout=1)
+    assert waited.body == {"task": 8}
+    assert not reliable.redis_client.exists(worker.inbox, reliable.inboxes)
+    server_now = reliable.redis_client.time()[0]
+    assert (
+        reliable.redis_client.zscore(reliable.leases, waited.receipt)
+        > server_now * 1000
+    )
+    time.sleep(0.15)
+    assert reliable.reap() == (1, 0)
+    redelivered = reliable.consume()
+    assert redelivered.attempts == 1 and reliable.ack(redelivered.receipt) == 1
+
+    reliable.publish({"task": 9})
+    worker.arm_script(keys=[reliable.inboxes], args=[worker.consumer, 100])
+    assert worker.redis_client.blmove(reliable.queue_name, worker.inbox, 1)
+    time.sleep(0.15)
+    assert reliable.reap() == (1, 0)
+    assert reliable.consume().body == {"task": 9}
+    reliable.clear()
+
+    reliable.publish({"task": 6})
+    crashed = worker.consume(timeout=1)
+    start_reaper(reliable, interval=0.05)
+    deadline = time.monotonic() + 2
+    while not (redelivered := reliable.consume_many(1)):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    redelivered = redelivered[0]
+    assert redelivered.body == crashed.body and redelivered.attempts == 1
+    assert worker.nack(crashed.receipt) == (0, 0)
+    assert worker.extend(crashed.receipt) == 0
+    assert worker.ack(crashed.receipt) == 0
+    assert reliable.ack(redelivered.receipt) == 1
+    assert redelivered.id == crashed.id and not reliable.redis_client.exists(
+        reliable.pending, reliable.leases, reliable.attempts
+    )
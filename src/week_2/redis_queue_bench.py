@@ -0,0 +1,105 @@
+import sys
+import time
+
+import redis
+
+from redis_queue import RedisQueue, ReliableQueue
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+MESSAGES = 20_000
+BATCH_SIZES = (1, 10, 100, 1000, 10_000)
+
+
+def connect() -> redis.Redis:
+    client = redis.Redis()
+    try:
+        client.ping()
+        return client
+    except redis.ConnectionError:
+        if fakeredis is None:
+            raise
+    print("redis-server недоступен, используется fakeredis (цифры не показательны)")
+    return fakeredis.FakeRedis()
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench(queue: RedisQueue, messages: int):
+    payload = [{"id": i, "body": "x" * 64} for i in range(messages)]
+    queue.redis_client.delete(queue.queue_name)
+
+    def publish_loop():
+        for msg in payload:
+            queue.publish(msg)
+
+    def consume_loop():
+        for _ in range(messages):
+            queue.consume()
+
+    elapsed = timed(publish_loop)
+    print(f"{'publish (цикл)':>24}: {messages / elapsed:10,.0f} сообщ/с")
+    elapsed = timed(consume_loop)
+    print(f"{'consume (цикл)':>24}: {messages / elapsed:10,.0f} сообщ/с")
+
+    for batch_size in BATCH_SIZES:
+        elapsed = timed(lambda: queue.publish_many(payload, batch_size))
+        print(
+            f"{f'publish_many({batch_size})':>24}: {messages / elapsed:10,.0f} сообщ/с"
+        )
+
+        def consume_batches():
+            received = 0
+            while received < messages:
+                received += len(queue.consume_many(batch_size))
+
+        elapsed = timed(consume_batches)
+        print(
+            f"{f'consume_many({batch_size})':>24}: {messages / elapsed:10,.0f} сообщ/с"
+        )
+
+    assert len(queue) == 0
+
+
+def round_trip(queue: RedisQueue, payload: list[dict], batch_size: int) -> float:
+    def run():
+        queue.publish_many(payload, batch_size)
+        received = 0
+        while received < len(payload):
+            messages = queue.consume_many(batch_size)
+            if isinstance(queue, ReliableQueue):
+                queue.ack(*[message.receipt for message in messages])
+            received += len(messages)
+
+    return len(payload) / timed(run)
+
+
+def bench_reliable(client: redis.Redis, messages: int, batch_size: int = 1000):
+    payload = [{"id": i, "body": "x" * 64} for i in range(messages)]
+    plain = RedisQueue("redis_queue_bench", client=client)
+    plain.redis_client.delete(plain.queue_name)
+    reliable = ReliableQueue("redis_queue_bench_reliable", client=client)
+    reliable.clear()
+
+    plain_rate = round_trip(plain, payload, batch_size)
+    reliable_rate = round_trip(reliable, payload, batch_size)
+    print(f"\n{'fire-and-forget':>24}: {plain_rate:10,.0f} сообщ/с")
+    print(
+        f"{'reliable + ack':>24}: {reliable_rate:10,.0f} сообщ/с "
+        f"({reliable_rate / plain_rate:.0%} от fire-and-forget)"
+    )
+    assert len(reliable) == 0
+
+
+if __name__ == "__main__":
+    messages = int(float(sys.argv[1])) if len(sys.argv) > 1 else MESSAGES
+    client = connect()
+    bench(RedisQueue("redis_queue_bench", client=client), messages)
+    bench_reliable(client, messages)